@@ -1,19 +1,949 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import argparse
+import csv
+import hashlib
 import json
-from datetime import datetime
+import sys
+import os
+import re
+import sqlite3
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timedelta
+from operator import attrgetter
+
+class Task:
+    # One task. Slots keep the per-task footprint small, and the added time
+    # is an integer epoch second rather than a formatted string.
+    __slots__ = ('id', 'text', 'completed', 'added')
+
+    def __init__(self, task_id, text, completed=False, added=None):
+        self.id = task_id
+        self.text = text
+        self.completed = completed
+        self.added = int(time.time()) if added is None else added
+
+    @classmethod
+    def from_dict(cls, data, task_id=None):
+        # Older files have no id and a "%Y-%m-%d %H:%M:%S" date_added string
+        if 'added' in data:
+            added = data['added']
+        else:
+            added = int(time.mktime(time.strptime(data['date_added'],
+                                                  "%Y-%m-%d %H:%M:%S")))
+        return cls(data.get('id', task_id), data['text'], data['completed'], added)
+
+    def to_dict(self):
+        return {'id': self.id, 'text': self.text, 'completed': self.completed,
+                'added': self.added}
+
+    def day(self):
+        return time.strftime("%Y-%m-%d", time.localtime(self.added))
+
+class TaskList(list):
+    # In-memory tasks ordered by id. Ids only ever grow, so a task's row is
+    # found by bisection instead of a scan.
+    def position(self, task_id):
+        index = bisect_left(self, task_id, key=attrgetter('id'))
+        if index == len(self) or self[index].id != task_id:
+            raise KeyError(task_id)
+        return index
+
+    def get(self, task_id):
+        return self[self.position(task_id)]
+
+def tasks_from_dicts(records):
+    return TaskList(Task.from_dict(record, task_id)
+                    for task_id, record in enumerate(records, 1))
+
+def read_snapshot(path):
+    # Snapshots are either a plain task list or {"seq": n, "tasks": [...]}
+    try:
+        with open(path, 'r') as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return 0, TaskList()
+    if isinstance(data, list):
+        return 0, tasks_from_dicts(data)
+    return data['seq'], tasks_from_dicts(data['tasks'])
+
+def write_json(path, data):
+    # Write to a temp file first so a crash never leaves a torn file
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+def write_snapshot(path, seq, tasks):
+    write_json(path, {'seq': seq, 'tasks': tasks})
+
+class BackgroundWriter:
+    # Writes JSON files on a worker thread. Saves scheduled within the
+    # debounce window collapse into one write of the latest data. The
+    # snapshot function runs on the worker, so it must copy what it reads
+    # with a single C-level call (list(), dict()) to stay consistent. A
+    # failed write is reported and the worker carries on; flush() and
+    # close() then raise the error.
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.pending = {}
+        self.error = None
+        self.writing = False
+        self.flushing = False
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def schedule(self, path, snapshot):
+        with self.condition:
+            self.pending[path] = snapshot
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                
+                # Let a burst of changes settle, unless someone is waiting
+                deadline = time.monotonic() + self.delay
+                while (not self.closed and not self.flushing
+                       and time.monotonic() < deadline):
+                    self.condition.wait(deadline - time.monotonic())
+                pending, self.pending = self.pending, {}
+                self.writing = True
+            
+            try:
+                for path, snapshot in pending.items():
+                    try:
+                        write_json(path, snapshot())
+                    except Exception as error:
+                        print(f"Could not save {path}: {error}", file=sys.stderr)
+                        self.error = error
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def raise_error(self):
+        # Raises the last failed write, once
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        # Block until everything scheduled so far is on disk
+        with self.condition:
+            self.flushing = True
+            self.condition.notify_all()
+            while self.pending or self.writing:
+                self.condition.wait()
+            self.flushing = False
+        self.raise_error()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.raise_error()
+
+class MemoryTaskStorage:
+    # Keeps nothing on disk; for scripting and benchmarks
+    def load(self):
+        return TaskList()
+
+    def add(self, tasks, task):
+        pass
+
+    def add_many(self, tasks, new_tasks):
+        pass
+
+    def update(self, tasks, task):
+        pass
+
+    def delete(self, tasks, task):
+        pass
+
+    def save(self, tasks):
+        pass
+
+    def stats(self, tasks):
+        return TaskStats(tasks)
+
+    def close(self):
+        pass
+
+class JsonTaskStorage(MemoryTaskStorage):
+    # Rewrites the whole task list on every change, on the writer's thread
+    # when one is given
+    def __init__(self, path='tasks.json', writer=None, journal_path='tasks.journal'):
+        self.path = path
+        self.writer = writer
+        self.journal_path = journal_path
+
+    def load(self):
+        fold_journal(self.path, self.journal_path)
+        return read_snapshot(self.path)[1]
+
+    def add(self, tasks, task):
+        self.save(tasks)
+
+    def add_many(self, tasks, new_tasks):
+        self.save(tasks)
+
+    def update(self, tasks, task):
+        self.save(tasks)
+
+    def delete(self, tasks, task):
+        self.save(tasks)
+
+    def save(self, tasks):
+        if self.writer is None:
+            write_json(self.path, [task.to_dict() for task in tasks])
+            return
+        self.writer.schedule(self.path,
+                             lambda: [task.to_dict() for task in list(tasks)])
+
+class JournalTaskStorage(MemoryTaskStorage):
+    # Appends one record per change and folds the journal back into the
+    # snapshot in the background once it outgrows the snapshot
+    def __init__(self, path='tasks.json', journal_path='tasks.journal',
+                 compact_size=1024 * 1024):
+        self.path = path
+        self.journal_path = journal_path
+        self.old_journal_path = journal_path + '.old'
+        self.compact_size = compact_size
+        self.seq = 0
+        self.snapshot_size = 0
+        self.journal = None
+        self.compactor = None
+
+    def load(self):
+        self.seq, tasks = read_snapshot(self.path)
+        if os.path.exists(self.path):
+            self.snapshot_size = os.path.getsize(self.path)
+        
+        # Replay records newer than the snapshot, including a journal that
+        # was rotated out by a compaction that never finished
+        tasks_by_id = {task.id: task for task in tasks}
+        for journal_path in (self.old_journal_path, self.journal_path):
+            self.replay(journal_path, tasks_by_id)
+        
+        self.journal = open(self.journal_path, 'a')
+        return TaskList(tasks_by_id.values())
+
+    def replay(self, journal_path, tasks_by_id):
+        try:
+            file = open(journal_path, 'r')
+        except FileNotFoundError:
+            return
+        with file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    break
+                if record['seq'] <= self.seq:
+                    continue
+                self.seq = record['seq']
+                if record['op'] == 'delete':
+                    del tasks_by_id[record['id']]
+                else:
+                    task = Task.from_dict(record['task'])
+                    tasks_by_id[task.id] = task
+
+    def append(self, records, tasks):
+        lines = []
+        for record in records:
+            self.seq += 1
+            record['seq'] = self.seq
+            lines.append(json.dumps(record) + '\n')
+        self.journal.write(''.join(lines))
+        self.journal.flush()
+        
+        if self.journal.tell() > max(self.compact_size, self.snapshot_size):
+            self.compact(tasks)
+
+    def add(self, tasks, task):
+        self.append([{'op': 'add', 'task': task.to_dict()}], tasks)
+
+    def add_many(self, tasks, new_tasks):
+        self.append([{'op': 'add', 'task': task.to_dict()} for task in new_tasks],
+                    tasks)
+
+    def update(self, tasks, task):
+        self.append([{'op': 'update', 'task': task.to_dict()}], tasks)
+
+    def delete(self, tasks, task):
+        self.append([{'op': 'delete', 'id': task.id}], tasks)
+
+    def compact(self, tasks):
+        if self.compactor is not None and self.compactor.is_alive():
+            return
+        
+        # Rotate the journal and copy the tasks here, so the main thread can
+        # keep appending while the snapshot is written
+        self.journal.close()
+        os.replace(self.journal_path, self.old_journal_path)
+        self.journal = open(self.journal_path, 'a')
+        snapshot = [task.to_dict() for task in tasks]
+        
+        self.compactor = threading.Thread(target=self.write_compacted,
+                                          args=(self.seq, snapshot),
+                                          daemon=True)
+        self.compactor.start()
+
+    def write_compacted(self, seq, snapshot):
+        write_snapshot(self.path, seq, snapshot)
+        self.snapshot_size = os.path.getsize(self.path)
+        os.remove(self.old_journal_path)
+
+    def close(self):
+        if self.compactor is not None:
+            self.compactor.join()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+def fold_journal(path='tasks.json', journal_path='tasks.journal'):
+    # Journal mode keeps its latest changes in the journal, which the other
+    # modes don't read. They fold it into the snapshot first, and remove it
+    # so a later journal run can't replay it over their changes.
+    old_journal_path = journal_path + '.old'
+    if not (os.path.exists(journal_path) or os.path.exists(old_journal_path)):
+        return
+    journal = JournalTaskStorage(path, journal_path)
+    tasks = journal.load()
+    journal.close()
+    write_snapshot(path, journal.seq, [task.to_dict() for task in tasks])
+    for stale_path in (old_journal_path, journal_path):
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+class TaskStats:
+    # Running counters kept up to date on every change, so statistics never
+    # rescan the task list. Per-day counts are keyed by the local day a task
+    # was added.
+    def __init__(self, tasks=()):
+        self.total = 0
+        self.completed = 0
+        self.added_per_day = Counter()
+        self.completed_per_day = Counter()
+        for task in tasks:
+            self.add(task)
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    def add(self, task):
+        day = task.day()
+        self.total += 1
+        self.added_per_day[day] += 1
+        if task.completed:
+            self.completed += 1
+            self.completed_per_day[day] += 1
+
+    def add_day(self, day, added, completed):
+        self.total += added
+        self.completed += completed
+        self.added_per_day[day] += added
+        self.completed_per_day[day] += completed
+
+    def remove(self, task):
+        day = task.day()
+        self.total -= 1
+        self.added_per_day[day] -= 1
+        if task.completed:
+            self.completed -= 1
+            self.completed_per_day[day] -= 1
+
+    def toggled(self, task):
+        # Call after flipping task.completed
+        step = 1 if task.completed else -1
+        self.completed += step
+        self.completed_per_day[task.day()] += step
+
+    def window(self, start=None, end=None):
+        # Days are "YYYY-MM-DD" strings, so they compare in date order
+        added = completed = 0
+        for day, count in self.added_per_day.items():
+            if (start is None or day >= start) and (end is None or day <= end):
+                added += count
+                completed += self.completed_per_day[day]
+        return added, completed
+
+    def completion_rate(self, start=None, end=None):
+        added, completed = self.window(start, end)
+        return completed / added if added else 0.0
+
+    def recent_completion_rate(self, days=7):
+        start = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        return self.completion_rate(start)
+
+class SqliteTaskList:
+    # A paged, write-through window onto the tasks table. Rows are fetched
+    # with LIMIT/OFFSET as they are indexed, so only the pages the listbox
+    # actually shows are ever held in memory.
+    PAGE_SIZE = 100
+
+    def __init__(self, connection, condition='1', params=()):
+        self.connection = connection
+        self.condition = condition
+        self.params = params
+        self.invalidate()
+
+    def invalidate(self):
+        self.count = None
+        self.pages = {}
+
+    def __len__(self):
+        if self.count is None:
+            self.count = self.connection.execute(
+                f"SELECT COUNT(*) FROM tasks WHERE {self.condition}",
+                self.params).fetchone()[0]
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        page_number, offset = divmod(index, self.PAGE_SIZE)
+        page = self.pages.get(page_number)
+        if page is None:
+            page = self.fetch(page_number * self.PAGE_SIZE, self.PAGE_SIZE)
+            self.pages[page_number] = page
+        if offset >= len(page):
+            raise IndexError("task index out of range")
+        return page[offset]
+
+    def __iter__(self):
+        # Page by id rather than OFFSET so a full scan stays linear
+        last_id = 0
+        while True:
+            rows = self.connection.execute(
+                f"SELECT id, text, completed, added FROM tasks "
+                f"WHERE {self.condition} AND id > ? ORDER BY id LIMIT ?",
+                (*self.params, last_id, self.PAGE_SIZE)).fetchall()
+            for task_id, text, completed, added in rows:
+                yield Task(task_id, text, bool(completed), added)
+            if len(rows) < self.PAGE_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    def fetch(self, offset, limit):
+        rows = self.connection.execute(
+            f"SELECT id, text, completed, added FROM tasks WHERE {self.condition} "
+            f"ORDER BY id LIMIT ? OFFSET ?", (*self.params, limit, offset))
+        return [Task(task_id, text, bool(completed), added)
+                for task_id, text, completed, added in rows]
+
+    def get(self, task_id):
+        row = self.connection.execute(
+            "SELECT id, text, completed, added FROM tasks WHERE id = ?",
+            (task_id,)).fetchone()
+        if row is None:
+            raise KeyError(task_id)
+        task_id, text, completed, added = row
+        return Task(task_id, text, bool(completed), added)
+
+    def position(self, task_id):
+        found, position = self.connection.execute(
+            f"SELECT EXISTS (SELECT 1 FROM tasks WHERE {self.condition} AND id = ?), "
+            f"(SELECT COUNT(*) FROM tasks WHERE {self.condition} AND id < ?)",
+            (*self.params, task_id, *self.params, task_id)).fetchone()
+        if not found:
+            raise KeyError(task_id)
+        return position
+
+    def append(self, task):
+        self.connection.execute(
+            "INSERT INTO tasks (id, text, completed, added) VALUES (?, ?, ?, ?)",
+            (task.id, task.text, task.completed, task.added))
+        self.invalidate()
+
+    def extend(self, tasks):
+        # One transaction for the whole batch
+        with self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.executemany(
+                "INSERT INTO tasks (id, text, completed, added) VALUES (?, ?, ?, ?)",
+                ((task.id, task.text, task.completed, task.added) for task in tasks))
+        self.invalidate()
+
+    def __delitem__(self, index):
+        self.connection.execute("DELETE FROM tasks WHERE id = ?",
+                                (self[index].id,))
+        self.invalidate()
+
+    def save(self, task):
+        self.connection.execute(
+            "UPDATE tasks SET text = ?, completed = ? WHERE id = ?",
+            (task.text, task.completed, task.id))
+        self.invalidate()
+
+class SqliteTaskStorage(MemoryTaskStorage):
+    # Keeps tasks in an indexed SQLite database. The task list it hands out
+    # writes through on append and delete, so add/delete have nothing left
+    # to do and update only touches one row.
+    def __init__(self, path='tasks.db', import_path='tasks.json',
+                 journal_path='tasks.journal'):
+        self.path = path
+        self.import_path = import_path
+        self.journal_path = journal_path
+        self.connection = None
+
+    def load(self):
+        is_new = not os.path.exists(self.path)
+        self.connection = sqlite3.connect(self.path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY, text TEXT NOT NULL, "
+            "completed INTEGER NOT NULL DEFAULT 0, added INTEGER NOT NULL)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_added ON tasks (added)")
+        
+        # Carry over an existing tasks.json when the database is first created
+        fold_journal(self.import_path, self.journal_path)
+        if is_new:
+            tasks = read_snapshot(self.import_path)[1]
+            with self.connection:
+                self.connection.execute("BEGIN")
+                self.connection.executemany(
+                    "INSERT INTO tasks (id, text, completed, added) VALUES (?, ?, ?, ?)",
+                    ((task.id, task.text, task.completed, task.added)
+                     for task in tasks))
+        
+        return self.view()
+
+    def view(self, completed=None, since=None):
+        conditions = []
+        params = []
+        if completed is not None:
+            conditions.append("completed = ?")
+            params.append(int(completed))
+        if since is not None:
+            conditions.append("added >= ?")
+            params.append(since)
+        return SqliteTaskList(self.connection, " AND ".join(conditions) or "1",
+                              tuple(params))
+
+    def last_id(self):
+        return self.connection.execute("SELECT MAX(id) FROM tasks").fetchone()[0] or 0
+
+    def stats(self, tasks):
+        stats = TaskStats()
+        for day, added, completed in self.connection.execute(
+                "SELECT date(added, 'unixepoch', 'localtime'), COUNT(*), "
+                "SUM(completed) FROM tasks GROUP BY 1"):
+            stats.add_day(day, added, completed)
+        return stats
+
+    def update(self, tasks, task):
+        tasks.save(task)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+class TaskIndex:
+    # Inverted index over task words, plus completion and added-time
+    # indexes, so searches never scan the task list. The last word of a query
+    # matches as a prefix; when a query only extends the previous one and had
+    # few hits, those hits are narrowed instead of searching again.
+    NARROW_LIMIT = 2000
+
+    def __init__(self, tasks=()):
+        self.postings = {}
+        self.words = []
+        self.task_words = {}
+        self.task_added = {}
+        self.completed = set()
+        self.added = []
+        self.last_search = None
+        
+        # Build in bulk, then sort once instead of inserting in order
+        for task in tasks:
+            words = tuple(set(self.tokenize(task.text)))
+            self.task_words[task.id] = words
+            for word in words:
+                self.postings.setdefault(word, set()).add(task.id)
+            self.task_added[task.id] = task.added
+            self.added.append((task.added, task.id))
+            if task.completed:
+                self.completed.add(task.id)
+        self.words = sorted(self.postings)
+        self.added.sort()
+
+    def tokenize(self, text):
+        return re.findall(r'\w+', text.lower())
+
+    def add(self, task):
+        words = tuple(set(self.tokenize(task.text)))
+        self.task_words[task.id] = words
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                insort(self.words, word)
+            ids.add(task.id)
+        self.task_added[task.id] = task.added
+        insort(self.added, (task.added, task.id))
+        if task.completed:
+            self.completed.add(task.id)
+        self.last_search = None
+
+    def remove(self, task):
+        for word in self.task_words.pop(task.id):
+            ids = self.postings[word]
+            ids.discard(task.id)
+            if not ids:
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+        added = self.task_added.pop(task.id)
+        del self.added[bisect_left(self.added, (added, task.id))]
+        self.completed.discard(task.id)
+        self.last_search = None
+
+    def update(self, task):
+        # Words are remembered per task, so this works after the text changed
+        self.remove(task)
+        self.add(task)
+
+    def toggled(self, task):
+        if task.completed:
+            self.completed.add(task.id)
+        else:
+            self.completed.discard(task.id)
+        self.last_search = None
+
+    def search(self, text='', completed=None, start=None, end=None):
+        # Returns matching task ids in id order
+        words = self.tokenize(text)
+        prefix = ''
+        if words and text[-1:].isalnum():
+            prefix = words.pop()
+        key = (tuple(words), completed, start, end)
+        
+        if (self.last_search is not None and self.last_search[0] == key
+                and self.last_search[1] and prefix.startswith(self.last_search[1])
+                and len(self.last_search[2]) <= self.NARROW_LIMIT):
+            hits = self.narrow(self.last_search[2], prefix)
+        else:
+            hits = self.match(words, prefix, completed, start, end)
+        
+        self.last_search = (key, prefix, hits)
+        return sorted(hits)
+
+    def narrow(self, hits, prefix):
+        task_words = self.task_words
+        return {task_id for task_id in hits
+                if any(word.startswith(prefix) for word in task_words[task_id])}
+
+    def match(self, words, prefix, completed, start, end):
+        # Intersect the most selective sets first
+        hits = None
+        for word in sorted(words, key=lambda word: len(self.postings.get(word, ()))):
+            ids = self.postings.get(word, set())
+            hits = set(ids) if hits is None else hits & ids
+            if not hits:
+                return set()
+        
+        if prefix:
+            if hits is not None:
+                hits = self.narrow(hits, prefix)
+            else:
+                hits = set()
+                first = bisect_left(self.words, prefix)
+                last = bisect_left(self.words, prefix + '\uffff')
+                for word in self.words[first:last]:
+                    hits |= self.postings[word]
+        
+        if start is not None or end is not None:
+            if hits is not None and len(hits) < len(self.added) // 4:
+                hits = {task_id for task_id in hits
+                        if (start is None or self.task_added[task_id] >= start)
+                        and (end is None or self.task_added[task_id] <= end)}
+            else:
+                first = 0 if start is None else bisect_left(self.added, (start,))
+                last = (len(self.added) if end is None
+                        else bisect_left(self.added, (end + 1,)))
+                in_range = {task_id for _, task_id in self.added[first:last]}
+                hits = in_range if hits is None else hits & in_range
+        
+        if hits is None:
+            hits = set(self.task_words)
+        if completed is True:
+            hits &= self.completed
+        elif completed is False:
+            hits -= self.completed
+        return hits
+
+class TaskResults:
+    # Search hits as a read-only task sequence, fetched from the store by id
+    def __init__(self, store, ids):
+        self.store = store
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        return self.store.get(self.ids[index])
+
+class TaskStore:
+    # The task model, free of any Tk code. Tasks are addressed by stable id;
+    # every change goes to the storage backend and the running statistics.
+    def __init__(self, storage=None):
+        self.storage = storage if storage is not None else MemoryTaskStorage()
+        self.load()
+
+    def load(self):
+        self.tasks = self.storage.load()
+        self.stats = self.storage.stats(self.tasks)
+        self.index = None
+        if hasattr(self.storage, 'last_id'):
+            self.next_id = self.storage.last_id() + 1
+        else:
+            self.next_id = self.tasks[-1].id + 1 if self.tasks else 1
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __getitem__(self, index):
+        return self.tasks[index]
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def set_view(self, completed=None, since=None):
+        self.tasks = self.storage.view(completed, since)
+
+    def get(self, task_id):
+        return self.tasks.get(task_id)
+
+    def search(self, text='', completed=None, start=None, end=None):
+        # The index is built on first use, so stores that are never searched
+        # (or SQLite stores that page tasks in) pay nothing for it
+        if self.index is None:
+            self.index = TaskIndex(self.storage.view() if hasattr(self.storage, 'view')
+                                   else self.tasks)
+        return self.index.search(text, completed, start, end)
+
+    def add(self, text, completed=False, added=None):
+        task = Task(self.next_id, text, completed, added)
+        self.next_id += 1
+        self.tasks.append(task)
+        self.storage.add(self.tasks, task)
+        self.stats.add(task)
+        if self.index is not None:
+            self.index.add(task)
+        return task
+
+    def add_many(self, tasks):
+        # Tasks are (text, completed, added) tuples; stored as one batch
+        batch = []
+        for text, completed, added in tasks:
+            batch.append(Task(self.next_id, text, completed, added))
+            self.next_id += 1
+        self.tasks.extend(batch)
+        self.storage.add_many(self.tasks, batch)
+        for task in batch:
+            self.stats.add(task)
+            if self.index is not None:
+                self.index.add(task)
+        return batch
+
+    def toggle(self, task_id):
+        position = self.tasks.position(task_id)
+        task = self.tasks[position]
+        task.completed = not task.completed
+        self.storage.update(self.tasks, task)
+        self.stats.toggled(task)
+        if self.index is not None:
+            self.index.toggled(task)
+        return position
+
+    def edit(self, task_id, text):
+        position = self.tasks.position(task_id)
+        task = self.tasks[position]
+        task.text = text
+        self.storage.update(self.tasks, task)
+        if self.index is not None:
+            self.index.update(task)
+        return position
+
+    def delete(self, task_id):
+        position = self.tasks.position(task_id)
+        task = self.tasks[position]
+        self.stats.remove(task)
+        if self.index is not None:
+            self.index.remove(task)
+        del self.tasks[position]
+        self.storage.delete(self.tasks, task)
+        return position
+
+    def close(self):
+        self.storage.close()
+
+class TaskListView:
+    # Keeps a listbox in step with the task list by touching only the rows
+    # that changed. In virtual mode only the visible window of rows exists
+    # in the listbox and the scrollbar is driven from the task count. Search
+    # results always use virtual mode, as building every row of a big result
+    # set on each keystroke would blow the frame budget.
+    def __init__(self, listbox, scrollbar, tasks, virtual=False):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.tasks = tasks
+        self.always_virtual = virtual
+        self.virtual = None
+        self.top = 0
+        self.selected = None
+        self.height = int(listbox.cget('height'))
+        
+        listbox.bind('<<ListboxSelect>>', self.remember_selection)
+        listbox.bind('<MouseWheel>', self.on_mousewheel)
+        listbox.bind('<Button-4>', lambda e: self.on_scroll_button(-1))
+        listbox.bind('<Button-5>', lambda e: self.on_scroll_button(1))
+        self.set_virtual(virtual)
+
+    def set_virtual(self, virtual):
+        if virtual == self.virtual:
+            return
+        self.virtual = virtual
+        if virtual:
+            self.listbox.configure(yscrollcommand='')
+            self.scrollbar.config(command=self.yview)
+        else:
+            self.listbox.configure(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.config(command=self.listbox.yview)
+
+    def show(self, tasks):
+        # Switches to another task sequence; call refresh() to draw it
+        self.tasks = tasks
+        self.set_virtual(self.always_virtual or isinstance(tasks, TaskResults))
+
+    def row_text(self, task):
+        prefix = "✓ " if task.completed else "○ "
+        return prefix + task.text
+
+    def put_row(self, row, task):
+        self.listbox.insert(row, self.row_text(task))
+        if task.completed:
+            self.listbox.itemconfig(row, fg='gray')
+
+    def refresh(self):
+        self.listbox.delete(0, tk.END)
+        if self.virtual:
+            self.render_window()
+            return
+        for row, task in enumerate(self.tasks):
+            self.put_row(row, task)
+
+    def insert(self, index):
+        if self.virtual:
+            self.render_window()
+            return
+        self.put_row(index, self.tasks[index])
+
+    def delete(self, index):
+        if self.virtual:
+            if self.selected == index:
+                self.selected = None
+            elif self.selected is not None and self.selected > index:
+                self.selected -= 1
+            self.render_window()
+            return
+        self.listbox.delete(index)
+
+    def update(self, index):
+        if self.virtual:
+            self.render_window()
+            return
+        row = index
+        if not 0 <= row < self.listbox.size():
+            return
+        was_selected = self.listbox.selection_includes(row)
+        self.listbox.delete(row)
+        self.put_row(row, self.tasks[index])
+        if was_selected:
+            self.listbox.selection_set(row)
+
+    def selected_index(self):
+        if self.virtual:
+            return self.selected
+        selection = self.listbox.curselection()
+        return selection[0] if selection else None
+
+    def remember_selection(self, event=None):
+        if not self.virtual:
+            return
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def render_window(self):
+        # Clamp the window to the task count, then materialize only its rows
+        total = len(self.tasks)
+        self.top = max(0, min(self.top, total - self.height))
+        bottom = min(total, self.top + self.height)
+        
+        self.listbox.delete(0, tk.END)
+        for index in range(self.top, bottom):
+            self.put_row(index - self.top, self.tasks[index])
+        if self.selected is not None and self.top <= self.selected < bottom:
+            self.listbox.selection_set(self.selected - self.top)
+        
+        if total:
+            self.scrollbar.set(self.top / total, bottom / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        total = len(self.tasks)
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = self.height if args[2] == 'pages' else 1
+            self.top += int(args[1]) * step
+        self.render_window()
+
+    def on_mousewheel(self, event):
+        if not self.virtual:
+            return None
+        self.yview('scroll', -1 if event.delta > 0 else 1, 'units')
+        return 'break'
+
+    def on_scroll_button(self, direction):
+        if not self.virtual:
+            return None
+        self.yview('scroll', direction, 'units')
+        return 'break'
 
 class ToDoList:
-    def __init__(self, root):
+    def __init__(self, root, storage=None, virtual=False):
         self.root = root
         self.root.title("To-Do List Application")
         self.root.geometry("600x700")
         
-        # Task storage
-        self.tasks = []
-        
         # Load saved tasks
-        self.load_tasks()
+        self.store = TaskStore(storage if storage is not None else JsonTaskStorage())
         
         # Create main frame
         self.main_frame = ttk.Frame(root, padding="20")
@@ -35,9 +965,34 @@ class ToDoList:
                               command=self.add_task)
         add_button.grid(row=1, column=1, padx=5, pady=5)
         
+        # Search and filters
+        search_frame = ttk.Frame(self.main_frame)
+        search_frame.grid(row=2, column=0, columnspan=2, pady=(10, 0), sticky=tk.W)
+        
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace('w', lambda *args: self.apply_filter())
+        ttk.Entry(search_frame, textvariable=self.search_var,
+                  width=20).pack(side=tk.LEFT, padx=5)
+        
+        self.status_filter_var = tk.StringVar(value="All")
+        status_box = ttk.Combobox(search_frame, textvariable=self.status_filter_var,
+                                  state='readonly', width=10,
+                                  values=["All", "Pending", "Completed"])
+        status_box.pack(side=tk.LEFT, padx=5)
+        status_box.bind('<<ComboboxSelected>>', lambda e: self.apply_filter())
+        
+        self.date_filter_var = tk.StringVar(value="Any Time")
+        date_box = ttk.Combobox(search_frame, textvariable=self.date_filter_var,
+                                state='readonly', width=10,
+                                values=["Any Time", "Today", "This Week",
+                                        "This Month"])
+        date_box.pack(side=tk.LEFT, padx=5)
+        date_box.bind('<<ComboboxSelected>>', lambda e: self.apply_filter())
+        
         # Task list frame
         task_frame = ttk.Frame(self.main_frame)
-        task_frame.grid(row=2, column=0, columnspan=2, pady=20)
+        task_frame.grid(row=3, column=0, columnspan=2, pady=20)
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(task_frame)
@@ -46,14 +1001,14 @@ class ToDoList:
         # Task listbox
         self.task_listbox = tk.Listbox(task_frame, width=50, height=15,
                                      font=('Arial', 12),
-                                     selectmode=tk.SINGLE,
-                                     yscrollcommand=scrollbar.set)
+                                     selectmode=tk.SINGLE)
         self.task_listbox.pack(side=tk.LEFT, fill=tk.BOTH)
-        scrollbar.config(command=self.task_listbox.yview)
+        self.task_view = TaskListView(self.task_listbox, scrollbar, self.store,
+                                      virtual)
         
         # Buttons frame
         button_frame = ttk.Frame(self.main_frame)
-        button_frame.grid(row=3, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=4, column=0, columnspan=2, pady=10)
         
         # Action buttons
         ttk.Button(button_frame, text="Complete Task", 
@@ -65,15 +1020,17 @@ class ToDoList:
         
         # Statistics frame
         stats_frame = ttk.LabelFrame(self.main_frame, text="Statistics", padding="10")
-        stats_frame.grid(row=4, column=0, columnspan=2, pady=20, sticky=(tk.W, tk.E))
+        stats_frame.grid(row=5, column=0, columnspan=2, pady=20, sticky=(tk.W, tk.E))
         
         self.total_tasks_var = tk.StringVar(value="Total Tasks: 0")
         self.completed_tasks_var = tk.StringVar(value="Completed Tasks: 0")
         self.pending_tasks_var = tk.StringVar(value="Pending Tasks: 0")
+        self.weekly_rate_var = tk.StringVar(value="Completed This Week: 0%")
         
         ttk.Label(stats_frame, textvariable=self.total_tasks_var).pack()
         ttk.Label(stats_frame, textvariable=self.completed_tasks_var).pack()
         ttk.Label(stats_frame, textvariable=self.pending_tasks_var).pack()
+        ttk.Label(stats_frame, textvariable=self.weekly_rate_var).pack()
         
         # Bind events
         self.task_entry.bind('<Return>', lambda e: self.add_task())
@@ -84,44 +1041,74 @@ class ToDoList:
         self.update_stats()
 
     def load_tasks(self):
-        try:
-            with open('tasks.json', 'r') as file:
-                self.tasks = json.load(file)
-        except FileNotFoundError:
-            self.tasks = []
+        self.store.load()
+
+    def filter_start(self):
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        days = {"Today": 0, "This Week": 6, "This Month": 29}.get(
+            self.date_filter_var.get())
+        if days is None:
+            return None
+        return int((today - timedelta(days=days)).timestamp())
+
+    def apply_filter(self):
+        self.task_view.top = 0
+        self.task_view.selected = None
+        self.run_filter()
+
+    def run_filter(self):
+        text = self.search_var.get()
+        completed = {"Pending": False, "Completed": True}.get(
+            self.status_filter_var.get())
+        since = self.filter_start()
+        
+        if not text.strip() and isinstance(self.store.storage, SqliteTaskStorage):
+            # Without search text, SQLite answers the filters with its indexes
+            self.store.set_view(completed, since)
+            self.task_view.show(self.store)
+        elif text.strip() or completed is not None or since is not None:
+            # Results are looked up by id in the store, so the store must not
+            # be left on a filtered SQLite view from an earlier filter
+            if isinstance(self.store.storage, SqliteTaskStorage):
+                self.store.set_view()
+            self.task_view.show(TaskResults(
+                self.store, self.store.search(text, completed, since)))
+        else:
+            self.task_view.show(self.store)
+        self.update_listbox()
+
+    def show_change(self, update_row, position):
+        # Search results can gain or lose rows on any change, so re-run them
+        if isinstance(self.task_view.tasks, TaskResults):
+            self.task_view.selected = None
+            self.run_filter()
+        else:
+            update_row(position)
 
     def save_tasks(self):
-        with open('tasks.json', 'w') as file:
-            json.dump(self.tasks, file)
+        self.store.storage.save(self.store.tasks)
+
+    def selected_task(self):
+        index = self.task_view.selected_index()
+        return self.task_view.tasks[index] if index is not None else None
 
     def add_task(self):
         task_text = self.task_var.get().strip()
         if task_text:
-            new_task = {
-                'text': task_text,
-                'completed': False,
-                'date_added': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            self.tasks.append(new_task)
+            self.store.add(task_text)
             self.task_var.set("")
-            self.update_listbox()
+            self.show_change(self.task_view.insert, len(self.store) - 1)
             self.update_stats()
-            self.save_tasks()
 
     def complete_task(self):
-        selection = self.task_listbox.curselection()
-        if selection:
-            index = selection[0]
-            self.tasks[index]['completed'] = not self.tasks[index]['completed']
-            self.update_listbox()
+        task = self.selected_task()
+        if task is not None:
+            self.show_change(self.task_view.update, self.store.toggle(task.id))
             self.update_stats()
-            self.save_tasks()
 
     def edit_task(self):
-        selection = self.task_listbox.curselection()
-        if selection:
-            index = selection[0]
-            task = self.tasks[index]
+        task = self.selected_task()
+        if task is not None:
             
             # Create edit window
             edit_window = tk.Toplevel(self.root)
@@ -129,55 +1116,355 @@ class ToDoList:
             edit_window.geometry("400x150")
             
             # Add entry field
-            edit_var = tk.StringVar(value=task['text'])
+            edit_var = tk.StringVar(value=task.text)
             edit_entry = ttk.Entry(edit_window, textvariable=edit_var, width=40)
             edit_entry.pack(padx=20, pady=20)
             
             def save_edit():
                 new_text = edit_var.get().strip()
                 if new_text:
-                    task['text'] = new_text
-                    self.update_listbox()
-                    self.save_tasks()
+                    self.show_change(self.task_view.update,
+                                     self.store.edit(task.id, new_text))
                     edit_window.destroy()
             
             # Add save button
             ttk.Button(edit_window, text="Save", command=save_edit).pack()
 
     def delete_task(self):
-        selection = self.task_listbox.curselection()
-        if selection:
+        task = self.selected_task()
+        if task is not None:
             if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this task?"):
-                index = selection[0]
-                del self.tasks[index]
-                self.update_listbox()
+                self.show_change(self.task_view.delete, self.store.delete(task.id))
                 self.update_stats()
-                self.save_tasks()
 
     def update_listbox(self):
-        self.task_listbox.delete(0, tk.END)
-        for task in self.tasks:
-            prefix = "✓ " if task['completed'] else "○ "
-            text = prefix + task['text']
-            self.task_listbox.insert(tk.END, text)
-            
-            # Set color based on completion status
-            if task['completed']:
-                self.task_listbox.itemconfig(tk.END, fg='gray')
+        self.task_view.refresh()
 
     def update_stats(self):
-        total = len(self.tasks)
-        completed = sum(1 for task in self.tasks if task['completed'])
-        pending = total - completed
+        stats = self.store.stats
+        self.total_tasks_var.set(f"Total Tasks: {stats.total}")
+        self.completed_tasks_var.set(f"Completed Tasks: {stats.completed}")
+        self.pending_tasks_var.set(f"Pending Tasks: {stats.pending}")
+        self.weekly_rate_var.set(
+            f"Completed This Week: {stats.recent_completion_rate():.0%}")
+
+TASK_FIELDS = ['id', 'text', 'completed', 'added']
+
+def file_format(path, fmt=None):
+    if fmt is not None:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def read_task_records(file, fmt):
+    # Yields (line number, record) one at a time; bad lines are yielded as
+    # None so the caller can report them
+    if fmt == 'csv':
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record
+
+def parse_task_record(record):
+    # Returns (text, completed, added) or raises ValueError
+    if not isinstance(record, dict):
+        raise ValueError("not an object")
+    text = record.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("missing text")
+    
+    completed = record.get('completed', False)
+    if isinstance(completed, str):
+        if completed.strip().lower() not in ('true', 'false', '1', '0', ''):
+            raise ValueError(f"bad completed value {completed!r}")
+        completed = completed.strip().lower() in ('true', '1')
+    elif isinstance(completed, int) and not isinstance(completed, bool):
+        # 0 and 1 as in CSV, but not other numbers
+        if completed not in (0, 1):
+            raise ValueError(f"bad completed value {completed!r}")
+        completed = completed == 1
+    elif not isinstance(completed, bool):
+        raise ValueError(f"bad completed value {completed!r}")
+    
+    if record.get('added') not in (None, ''):
+        added = int(record['added'])
+    elif record.get('date_added'):
+        added = int(time.mktime(time.strptime(record['date_added'],
+                                              "%Y-%m-%d %H:%M:%S")))
+    else:
+        added = int(time.time())
+    return text.strip(), completed, added
+
+def task_digest(text, added):
+    # 8 bytes per task is all deduplication has to remember
+    return hashlib.blake2b(f"{added}\0{text}".encode(), digest_size=8).digest()
+
+def import_tasks(store, path, fmt=None, batch_size=10000, errors=sys.stderr):
+    # Streams records into the store in batches, skipping invalid records and
+    # tasks with the same text and added time as one already stored
+    seen = {task_digest(task.text, task.added) for task in store}
+    imported = duplicates = rejected = 0
+    batch = []
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        for line_number, record in read_task_records(file, file_format(path, fmt)):
+            try:
+                task = parse_task_record(record)
+            except (ValueError, TypeError) as error:
+                print(f"{path}:{line_number}: rejected: {error}", file=errors)
+                rejected += 1
+                continue
+            
+            digest = task_digest(task[0], task[2])
+            if digest in seen:
+                duplicates += 1
+                continue
+            seen.add(digest)
+            
+            batch.append(task)
+            if len(batch) >= batch_size:
+                imported += len(store.add_many(batch))
+                batch = []
+    if batch:
+        imported += len(store.add_many(batch))
+    return imported, duplicates, rejected
+
+def export_tasks(store, path, fmt=None):
+    exported = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        if file_format(path, fmt) == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(TASK_FIELDS)
+            for task in store:
+                writer.writerow([task.id, task.text, task.completed, task.added])
+                exported += 1
+        else:
+            for task in store:
+                file.write(json.dumps(task.to_dict()) + '\n')
+                exported += 1
+    return exported
+
+def timed(operation, runs):
+    # Average milliseconds per call
+    start = time.perf_counter()
+    for _ in range(runs):
+        operation()
+    return (time.perf_counter() - start) / runs * 1000
+
+def benchmark_rendering(count=50000, repeat=20):
+    # Compare one full redraw against the per-row updates of TaskListView
+    root = tk.Tk()
+    root.withdraw()
+    store = TaskStore()
+    for i in range(count):
+        store.add(f"Task {i}", i % 3 == 0)
+    
+    print(f"Rendering {count} tasks, milliseconds per operation:")
+    for virtual in (False, True):
+        listbox = tk.Listbox(root, height=15)
+        scrollbar = ttk.Scrollbar(root)
+        view = TaskListView(listbox, scrollbar, store, virtual)
+        view.refresh()
+        middle_id = store[count // 2].id
+        
+        def toggle():
+            view.update(store.toggle(middle_id))
         
-        self.total_tasks_var.set(f"Total Tasks: {total}")
-        self.completed_tasks_var.set(f"Completed Tasks: {completed}")
-        self.pending_tasks_var.set(f"Pending Tasks: {pending}")
+        def add_and_delete():
+            task = store.add("New task")
+            view.insert(len(store) - 1)
+            view.delete(store.delete(task.id))
+        
+        mode = "virtual" if virtual else "diff"
+        print(f"  {mode:8} full redraw:     {timed(view.refresh, 3):10.3f}")
+        print(f"  {mode:8} toggle one row:  {timed(toggle, repeat):10.3f}")
+        print(f"  {mode:8} add + delete:    {timed(add_and_delete, repeat):10.3f}")
+        listbox.destroy()
+        scrollbar.destroy()
+    root.destroy()
+
+def benchmark_store(count=100000):
+    # Compare the original dict-per-task list with TaskStore, headless
+    def build_dicts():
+        return [{'text': f"Task {i}", 'completed': False,
+                 'date_added': datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+                for i in range(count)]
+
+    def build_store():
+        store = TaskStore()
+        for i in range(count):
+            store.add(f"Task {i}")
+        return store
+    
+    print(f"{count} tasks:")
+    for name, build in (("dict list", build_dicts), ("TaskStore", build_store)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        tasks = build()
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  {name:10} {size / count:7.1f} bytes/task, "
+              f"{count / elapsed:12,.0f} adds/sec")
+    
+    # The original recounted completed tasks after every change, so the
+    # dict list pays for that here too
+    tasks = build_dicts()
+    store = build_store()
+    runs = 1000
+    positions = [(i * 7919) % count for i in range(runs)]
+    ids = [store[position].id for position in positions]
+    
+    def toggle_dicts():
+        for position in positions:
+            tasks[position]['completed'] = not tasks[position]['completed']
+            sum(1 for task in tasks if task['completed'])
+    
+    def toggle_store():
+        for task_id in ids:
+            store.toggle(task_id)
+            store.stats.completed
+    
+    def delete_dicts():
+        for _ in range(runs):
+            del tasks[len(tasks) // 2]
+            sum(1 for task in tasks if task['completed'])
+    
+    def delete_store():
+        for _ in range(runs):
+            store.delete(store[len(store) // 2].id)
+            store.stats.completed
+    
+    for name, toggle, delete in (("dict list", toggle_dicts, delete_dicts),
+                                 ("TaskStore", toggle_store, delete_store)):
+        print(f"  {name:10} {runs / timed(toggle, 1) * 1000:12,.0f} toggles/sec, "
+              f"{runs / timed(delete, 1) * 1000:12,.0f} deletes/sec")
+
+def benchmark_search(count=100000, frame_ms=1000 / 60, height=15):
+    # Time each keystroke of a few queries, from the search to the listbox
+    # rows it shows, against a linear scan of the tasks. "window" builds the
+    # visible rows of the virtual window the results are shown in; "all
+    # rows" builds every result row, as a full redraw would.
+    import random
+    rng = random.Random(1)
+    syllables = ["ba", "co", "de", "fi", "gu", "ha", "ki", "lo", "me", "no",
+                 "pa", "ri", "so", "tu", "ve", "wa", "xi", "yo", "za"]
+    vocabulary = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+                  for _ in range(5000)]
+    store = TaskStore()
+    store.add_many((" ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 6))),
+                    rng.random() < 0.3, 1700000000 + i) for i in range(count))
+    
+    start = time.perf_counter()
+    store.search()
+    print(f"Indexed {count} tasks in {time.perf_counter() - start:.2f}s")
+    
+    def rows(results, limit):
+        return [TaskListView.row_text(None, results[index])
+                for index in range(min(len(results), limit))]
+    
+    def search_rows(text, limit):
+        return rows(TaskResults(store, store.search(text, completed=False)), limit)
+    
+    queries = [" ".join(rng.sample(vocabulary, 2)) for _ in range(5)]
+    for name, search in (
+            ("index", lambda text: store.search(text, completed=False)),
+            ("window", lambda text: search_rows(text, height)),
+            ("all rows", lambda text: search_rows(text, count)),
+            ("scan", lambda text: [task.id for task in store
+                                   if text.lower() in task.text.lower()
+                                   and not task.completed])):
+        times = []
+        for query in queries:
+            # From the empty search box ("Pending" alone) to the full query
+            for length in range(len(query) + 1):
+                start = time.perf_counter()
+                search(query[:length])
+                times.append((time.perf_counter() - start) * 1000)
+        slow = sum(1 for elapsed in times if elapsed > frame_ms)
+        print(f"  {name:8} {sum(times) / len(times):8.3f} ms mean, "
+              f"{max(times):8.3f} ms max, {slow}/{len(times)} keystrokes "
+              f"over the {frame_ms:.1f} ms frame budget")
 
 def main():
+    parser = argparse.ArgumentParser(description="To-Do List Application")
+    parser.add_argument('--storage', choices=['json', 'journal', 'sqlite'],
+                        default='json',
+                        help="rewrite tasks.json on every change, append "
+                             "changes to tasks.journal, or keep tasks in tasks.db")
+    parser.add_argument('--import', dest='import_path', metavar='FILE',
+                        help="stream tasks from a JSON Lines or CSV file into "
+                             "the store, without opening the window")
+    parser.add_argument('--export', dest='export_path', metavar='FILE',
+                        help="stream all tasks to a JSON Lines or CSV file")
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help="file format for --import/--export (default: "
+                             "from the file extension)")
+    parser.add_argument('--virtual', action='store_true',
+                        help="only materialize the visible rows of the task list")
+    parser.add_argument('--benchmark', choices=['render', 'store', 'search'],
+                        help="time full redraws against incremental row updates, "
+                             "the task model against plain dicts, or search "
+                             "keystrokes against a linear scan")
+    args = parser.parse_args()
+    
+    if args.benchmark == 'render':
+        benchmark_rendering()
+        return
+    if args.benchmark == 'store':
+        benchmark_store()
+        return
+    if args.benchmark == 'search':
+        benchmark_search()
+        return
+    
+    virtual = args.virtual
+    writer = BackgroundWriter()
+    if args.storage == 'journal':
+        storage = JournalTaskStorage()
+    elif args.storage == 'sqlite':
+        # The SQLite list pages rows in on demand, which only pays off when
+        # the listbox asks for the visible rows alone
+        storage = SqliteTaskStorage()
+        virtual = True
+    else:
+        storage = JsonTaskStorage(writer=writer)
+    
+    if args.import_path or args.export_path:
+        store = TaskStore(storage)
+        try:
+            if args.import_path:
+                start = time.perf_counter()
+                imported, duplicates, rejected = import_tasks(
+                    store, args.import_path, args.format)
+                elapsed = time.perf_counter() - start
+                rows = imported + duplicates + rejected
+                print(f"Imported {imported} tasks ({duplicates} duplicates, "
+                      f"{rejected} rejected) at {rows / elapsed:,.0f} rows/sec")
+            if args.export_path:
+                start = time.perf_counter()
+                exported = export_tasks(store, args.export_path, args.format)
+                elapsed = time.perf_counter() - start
+                print(f"Exported {exported} tasks at {exported / elapsed:,.0f} rows/sec")
+        finally:
+            store.close()
+            writer.close()
+        return
+    
     root = tk.Tk()
-    app = ToDoList(root)
-    root.mainloop()
+    app = ToDoList(root, storage, virtual)
+    try:
+        root.mainloop()
+    finally:
+        # Flush any debounced save before the process exits
+        app.store.close()
+        writer.close()
 
 if __name__ == "__main__":
     main()
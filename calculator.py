@@ -1,8 +1,513 @@
 import tkinter as tk
 from tkinter import ttk
+import argparse
+import csv
+import math
+import operator
+import re
+import sys
+import time
+from decimal import Decimal, getcontext, localcontext
+from fractions import Fraction
+from functools import lru_cache
+from itertools import islice, repeat
+
+# Numbers (with the exponent str() gives big floats), variable names for
+# batch formulas, and operators, including ** and // typed as two presses
+TOKEN_PATTERN = re.compile(r'\s*(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?'
+                           r'|[A-Za-z_]\w*|\*\*|//|[-+*/%])')
+
+# Exact powers with more bits than this are refused rather than left to
+# freeze the window
+POWER_BITS = 10000000
+
+def power(base, exponent, limit=POWER_BITS):
+    # ** with a size check first for exact results, which can grow without
+    # bound; floats and Decimals overflow by themselves, as does an int to a
+    # negative power, which is a float. 0, 1 and -1 stay small.
+    if (isinstance(base, (int, Fraction)) and isinstance(exponent, (int, Fraction))
+            and not (isinstance(base, int) and exponent < 0)):
+        base_fraction = Fraction(base)
+        bits = max(abs(base_fraction.numerator).bit_length(),
+                   base_fraction.denominator.bit_length())
+        if bits > 1 and bits * abs(exponent) > limit:
+            raise OverflowError("result too big")
+    return base ** exponent
+
+def floordiv(left, right):
+    # Decimal's // truncates toward zero; round toward minus infinity as
+    # ints, floats and fractions do, so every backend agrees
+    quotient = left // right
+    if isinstance(quotient, Decimal) and left % right and (left < 0) != (right < 0):
+        quotient -= 1
+    return quotient
+
+def mod(left, right):
+    # Decimal's % takes the sign of the left side; take the sign of the
+    # right side as ints, floats and fractions do
+    remainder = left % right
+    if isinstance(remainder, Decimal) and remainder and (remainder < 0) != (right < 0):
+        remainder += right
+    return remainder
+
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': floordiv,
+    '%': mod,
+    '**': power,
+}
+
+def tokenize(text):
+    tokens = TOKEN_PATTERN.findall(text)
+    if ''.join(tokens) != ''.join(text.split()):
+        # findall skipped something that is not a token; find out what
+        position = 0
+        while True:
+            match = TOKEN_PATTERN.match(text, position)
+            if not match:
+                raise SyntaxError(f"unexpected {text[position:].strip()[:1]!r}")
+            position = match.end()
+    return tokens
+
+def is_operand(token):
+    return token is not None and token[0] not in '+-*/%'
+
+def is_name(token):
+    return token[0].isalpha() or token[0] == '_'
+
+class Parser:
+    # Recursive descent with Python's precedence: + and -, then * / // %,
+    # then unary + and -, then ** (right associative). A % with nothing
+    # after it is a percentage, as on the button. Chains of + - * / are
+    # kept as flat lists so long expressions don't nest deeply.
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise SyntaxError("unexpected end of expression")
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.sum()
+        if self.peek() is not None:
+            raise SyntaxError(f"unexpected {self.peek()!r}")
+        return node
+
+    def sum(self):
+        first = self.product()
+        rest = []
+        while self.peek() in ('+', '-'):
+            rest.append((self.take(), self.product()))
+        return ('chain', first, rest) if rest else first
+
+    def product(self):
+        first = self.unary()
+        rest = []
+        while self.peek() in ('*', '/', '//', '%'):
+            op = self.take()
+            if op == '%' and self.peek() is None:
+                first = ('percent', ('chain', first, rest) if rest else first)
+                rest = []
+            else:
+                rest.append((op, self.unary()))
+        return ('chain', first, rest) if rest else first
+
+    def unary(self):
+        if self.peek() in ('+', '-'):
+            op = self.take()
+            return ('neg' if op == '-' else 'pos', self.unary())
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self.peek() == '**':
+            self.take()
+            return ('**', node, self.unary())
+        return node
+
+    def atom(self):
+        token = self.take()
+        if not is_operand(token):
+            raise SyntaxError(f"unexpected {token!r}")
+        return ('name' if is_name(token) else 'number', token)
+
+def number(text):
+    # Same types eval would give: int unless there is a point or exponent
+    if text.isdigit():
+        return int(text)
+    return float(text)
+
+# How number tokens are converted for each numeric backend
+BACKENDS = {
+    'float': number,
+    'decimal': Decimal,
+    'fraction': Fraction,
+}
+
+# Whole numbers under these operators stay whole, so ints are exact in any
+# backend (** only with a plain number for the exponent)
+INTEGER_OPERATORS = {'+', '-', '*', '//', '%', '**'}
+
+def compile_node(node, convert=number):
+    # Turns a parsed node into a closure that computes its value, with
+    # number tokens turned into values by convert
+    kind = node[0]
+    if kind == 'number':
+        value = convert(node[1])
+        return lambda: value
+    if kind == 'name':
+        raise SyntaxError(f"unknown name {node[1]!r}")
+    if kind == 'neg':
+        operand = compile_node(node[1], convert)
+        return lambda: -operand()
+    if kind == 'pos':
+        operand = compile_node(node[1], convert)
+        return lambda: +operand()
+    if kind == 'percent':
+        operand = compile_node(node[1], convert)
+        return lambda: operand() / 100
+    if kind == '**':
+        base = compile_node(node[1], convert)
+        exponent = compile_node(node[2], convert)
+        return lambda: power(base(), exponent())
+    
+    first = compile_node(node[1], convert)
+    rest = [(OPERATORS[op], compile_node(operand, convert)) for op, operand in node[2]]
+    
+    def chain():
+        value = first()
+        for op, operand in rest:
+            value = op(value, operand())
+        return value
+    return chain
+
+def is_whole_number_expression(tokens):
+    # Whether only ints can come out of these tokens
+    return (tokens[-1:] != ['%']
+            and all(token.isdigit() or token in INTEGER_OPERATORS for token in tokens)
+            and all(following.isdigit() for token, following in zip(tokens, tokens[1:])
+                    if token == '**'))
+
+@lru_cache(maxsize=1024)
+def compile_expression(text, backend='float'):
+    # Parsed and compiled once per display string and backend. Whole-number
+    # expressions are computed with plain ints whatever the backend, since
+    # they are exact anyway and much cheaper than Decimal or Fraction.
+    tokens = tokenize(text)
+    if is_whole_number_expression(tokens):
+        backend = 'float'
+    return compile_node(Parser(tokens).parse(), BACKENDS[backend])
+
+@lru_cache(maxsize=1024)
+def evaluate(text, backend='float', precision=28):
+    # Results are cached too, as the display has no variables
+    compute = compile_expression(text, backend)
+    if backend == 'decimal':
+        with localcontext() as context:
+            context.prec = precision
+            return compute()
+    return compute()
+
+def format_result(value):
+    # str() of a huge int is slow and refused past Python's digit limit, so
+    # those show their leading digits, worked out from the logarithm
+    if isinstance(value, Fraction) and value.denominator == 1:
+        value = value.numerator
+    elif isinstance(value, Fraction) and max(value.numerator.bit_length(),
+                                             value.denominator.bit_length()) > 10000:
+        return str(Decimal(value.numerator) / value.denominator)
+    if isinstance(value, int) and value.bit_length() > 10000:
+        exponent, mantissa = divmod(math.log10(abs(value)), 1)
+        sign = '-' if value < 0 else ''
+        return f"{sign}{10 ** mantissa:.9f}E+{int(exponent)}"
+    return str(value)
+
+def compile_column_node(node):
+    # Like compile_node, but the closure takes a dict of columns and returns
+    # an iterator over the results. Every operator is a map() over whole
+    # columns, so the loop over rows runs in C rather than once per row in
+    # Python, and no intermediate columns are built.
+    kind = node[0]
+    if kind == 'number':
+        value = number(node[1])
+        return lambda columns: repeat(value)
+    if kind == 'name':
+        name = node[1]
+        return lambda columns: iter(columns[name])
+    if kind in ('neg', 'pos'):
+        op = operator.neg if kind == 'neg' else operator.pos
+        operand = compile_column_node(node[1])
+        return lambda columns: map(op, operand(columns))
+    if kind == 'percent':
+        operand = compile_column_node(node[1])
+        return lambda columns: map(operator.truediv, operand(columns), repeat(100))
+    if kind == '**':
+        base = compile_column_node(node[1])
+        exponent = compile_column_node(node[2])
+        return lambda columns: map(power, base(columns), exponent(columns))
+    
+    first = compile_column_node(node[1])
+    rest = [(OPERATORS[op], compile_column_node(operand)) for op, operand in node[2]]
+    
+    def chain(columns):
+        values = first(columns)
+        for op, operand in rest:
+            values = map(op, values, operand(columns))
+        return values
+    return chain
+
+@lru_cache(maxsize=64)
+def compile_columns(text):
+    # Returns the column closure and the set of variable names it reads
+    tokens = tokenize(text)
+    names = frozenset(token for token in tokens if is_name(token))
+    return compile_column_node(Parser(tokens).parse()), names
+
+def evaluate_columns(text, columns):
+    # Evaluates text for every row of columns, a dict of variable name to a
+    # list of numbers, and returns the list of results
+    compute, names = compile_columns(text)
+    missing = names - columns.keys()
+    if missing:
+        raise SyntaxError(f"unknown name {min(missing)!r}")
+    rows = min((len(columns[name]) for name in names), default=1)
+    return list(islice(compute(columns), rows))
+
+def cell_number(text):
+    # A CSV cell as a float, or None if it isn't a number
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def column_numbers(cells):
+    # A column of CSV cells as floats, with None for cells that aren't
+    # numbers; float is mapped straight over the column unless that fails
+    try:
+        return list(map(float, cells))
+    except ValueError:
+        return list(map(cell_number, cells))
+
+def evaluate_rows(compute, columns, count):
+    # One row at a time, for a chunk where the column pass failed: a row
+    # that fails gets an error marker as its result instead of stopping the
+    # run
+    results = []
+    for row in range(count):
+        values = {name: [column[row]] for name, column in columns.items()}
+        missing = sorted(name for name, value in values.items() if value[0] is None)
+        if missing:
+            results.append(f"#ERROR: {missing[0]} is not a number")
+            continue
+        try:
+            results.append(next(compute(values)))
+        except (ValueError, ArithmeticError, TypeError) as error:
+            results.append(f"#ERROR: {error}")
+    return results
+
+def evaluate_csv(text, source, target, chunk_size=100000):
+    # Streams a CSV file with a header through evaluate_columns a chunk of
+    # rows at a time, so memory stays bounded however big the file is, and
+    # writes each row back out with a result column. A row that can't be
+    # evaluated gets an "#ERROR: ..." result rather than ending the run.
+    # Returns the number of rows and of failed rows.
+    reader = csv.reader(source)
+    writer = csv.writer(target)
+    header = next(reader, None)
+    if header is None:
+        return 0
+    compute, names = compile_columns(text)
+    missing = names - set(header)
+    if missing:
+        raise SyntaxError(f"unknown column {min(missing)!r}")
+    positions = {name: header.index(name) for name in names}
+    writer.writerow(header + ['result'])
+    
+    count = failed = 0
+    for chunk in iter(lambda: list(islice(reader, chunk_size)), []):
+        # Rows with the wrong number of fields are left out of the column
+        # pass and marked
+        rows = chunk
+        if set(map(len, chunk)) != {len(header)}:
+            rows = [row for row in chunk if len(row) == len(header)]
+        fields = list(zip(*rows)) or [()] * len(header)
+        columns = {name: column_numbers(fields[position])
+                   for name, position in positions.items()}
+        try:
+            # Everything is worked out before any of the chunk is written
+            results = list(islice(compute(columns), len(rows)))
+        except (ValueError, ArithmeticError, TypeError):
+            results = evaluate_rows(compute, columns, len(rows))
+            failed += sum(1 for result in results
+                          if isinstance(result, str) and result.startswith('#ERROR'))
+        if rows is chunk:
+            writer.writerows(zip(*fields, results))
+        else:
+            results = iter(results)
+            for row in chunk:
+                if len(row) == len(header):
+                    writer.writerow(row + [next(results)])
+                else:
+                    writer.writerow(row + [f"#ERROR: {len(row)} fields, "
+                                           f"the header has {len(header)}"])
+                    failed += 1
+        count += len(chunk)
+    return count, failed
+
+# Binding strength of each pending operator; unary minus and plus sit
+# between * and ** as in Python, and ** is the only right associative one
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '//': 2, '%': 2, 'neg': 3, 'pos': 3, '**': 4}
+
+def push(stack, item):
+    return (item, stack)
+
+# Exact powers bigger than this are left for = rather than worked out on
+# every keystroke of the exponent
+PREVIEW_POWER_BITS = 1000000
+
+def reduce_top(values, ops):
+    # Applies the top pending operator to the top values
+    op, ops = ops
+    right, values = values
+    if op == 'neg':
+        return (-right, values), ops
+    if op == 'pos':
+        return (+right, values), ops
+    left, values = values
+    if op == '**':
+        return (power(left, right, PREVIEW_POWER_BITS), values), ops
+    return (OPERATORS[op](left, right), values), ops
+
+class LivePreview:
+    # Evaluates the display text as it is typed, a character at a time. Each
+    # character's parse state is kept, so typing a key only extends the
+    # last state and backspace just drops it. Operators are applied as soon
+    # as precedence allows (shunting-yard), so a state holds a few pending
+    # values and operators whatever the length of the text, and the preview
+    # only has to finish those off. States are immutable linked tuples:
+    # (values, pending operators, number being typed, invalid).
+    START = (None, None, '', False)
+    
+    def __init__(self, backend='float', precision=28):
+        self.convert = BACKENDS[backend]
+        self.decimal_context = getcontext().copy()
+        self.decimal_context.prec = precision
+        self.text = ''
+        self.states = [self.START]
+        # Whole-number text is worked out with ints in every backend, as =
+        # does, so other backends keep an int preview alongside
+        self.whole_numbers = LivePreview() if backend != 'float' else None
+
+    def reset(self, text=''):
+        self.text = ''
+        self.states = [self.START]
+        if self.whole_numbers is not None:
+            self.whole_numbers.reset()
+        for char in text:
+            self.append(char)
+
+    def backspace(self):
+        if self.text:
+            self.text = self.text[:-1]
+            self.states.pop()
+            if self.whole_numbers is not None:
+                self.whole_numbers.backspace()
+
+    def append(self, char):
+        if self.whole_numbers is not None:
+            self.whole_numbers.append(char)
+        try:
+            state = self.step(char)
+        except (ValueError, ArithmeticError, TypeError):
+            state = None
+        if state is None:
+            state = (None, None, '', True)
+        self.text += char
+        self.states.append(state)
+
+    def step(self, char):
+        # Returns the state after char, or None if the text can't be valid
+        values, ops, token, invalid = self.states[-1]
+        if self.text[-1:] == char and char in '*/' and self.states[-2][2]:
+            # Second * or / makes ** or //, applied to the state before the
+            # first. Whatever the first one reduced, or failed to (8/0*),
+            # is dropped, as ** binds tighter than the pending operators.
+            return self.apply(self.states[-2], char * 2)
+        if invalid:
+            return None
+        if char.isdigit() or char == '.' or (char in 'eE' and token[:1].isdigit()):
+            return values, ops, token + char, False
+        if char in '+-' and token[-1:] in ('e', 'E'):
+            return values, ops, token + char, False
+        if char not in '+-*/%':
+            return None
+        
+        if token:
+            return self.apply(self.states[-1], char)
+        if char in '+-':
+            # Sign of the coming number
+            return values, push(ops, 'neg' if char == '-' else 'pos'), '', False
+        return None
+
+    def apply(self, state, op):
+        # Pushes the finished number, applies the pending operators that bind
+        # at least as tightly as op, then makes op pending
+        values, ops, token, invalid = state
+        values = push(values, self.convert(token))
+        precedence = PRECEDENCE[op]
+        with localcontext(self.decimal_context):
+            while ops is not None and (PRECEDENCE[ops[0]] > precedence or
+                                       PRECEDENCE[ops[0]] == precedence and op != '**'):
+                values, ops = reduce_top(values, ops)
+        return values, push(ops, op), '', False
+
+    def value(self):
+        # Value of the text so far, ignoring a trailing operator, or None
+        if self.whole_numbers is not None:
+            try:
+                if is_whole_number_expression(tokenize(self.text)):
+                    return self.whole_numbers.value()
+            except SyntaxError:
+                return None
+        values, ops, token, invalid = self.states[-1]
+        if invalid:
+            return None
+        try:
+            with localcontext(self.decimal_context):
+                if token:
+                    values = push(values, self.convert(token))
+                else:
+                    percent = self.text.endswith('%')
+                    while ops is not None and ops[0] in ('neg', 'pos'):
+                        ops = ops[1]
+                    if ops is None:
+                        return None
+                    ops = ops[1]
+                    if percent:
+                        # A final % is a percentage of the product before it
+                        while ops is not None and PRECEDENCE[ops[0]] >= 2:
+                            values, ops = reduce_top(values, ops)
+                        values = push(values[1], values[0] / 100)
+                while ops is not None:
+                    values, ops = reduce_top(values, ops)
+                return values[0]
+        except (ValueError, ArithmeticError, TypeError):
+            return None
 
 class Calculator:
-    def __init__(self, root):
+    def __init__(self, root, backend='float', precision=28):
         self.root = root
         self.root.title("Interactive Calculator")
         self.root.geometry("300x400")
@@ -11,15 +516,28 @@ class Calculator:
         # Variable to store current calculation
         self.current = ""
         
+        # Numeric backend for results: float, decimal or fraction
+        self.backend = backend
+        self.precision = precision
+        
+        # Whether the display shows an error instead of the calculation
+        self.error = False
+        
         # Create display
         self.display = ttk.Entry(root, justify="right", font=("Arial", 20))
         self.display.grid(row=0, column=0, columnspan=4, padx=5, pady=5, sticky="nsew")
         
+        # Live result of the calculation so far, under the display
+        self.preview = LivePreview(backend, precision)
+        self.preview_var = tk.StringVar()
+        ttk.Label(root, textvariable=self.preview_var, anchor="e",
+                  font=("Arial", 12)).grid(row=1, column=0, columnspan=4, padx=5, sticky="nsew")
+        
         # Button layout
         self.create_buttons()
         
         # Configure grid
-        for i in range(6):
+        for i in range(7):
             self.root.grid_rowconfigure(i, weight=1)
         for i in range(4):
             self.root.grid_columnconfigure(i, weight=1)
@@ -39,7 +557,7 @@ class Calculator:
         ]
         
         # Create and place buttons
-        row = 1
+        row = 2
         col = 0
         for text in button_texts:
             btn = ttk.Button(
@@ -54,17 +572,32 @@ class Calculator:
                 col = 0
                 row += 1
     
+    def show(self, text):
+        # Redraw the whole display; typing and backspace only touch its end
+        self.display.delete(0, tk.END)
+        self.display.insert(tk.END, text)
+        self.error = text == "Error"
+        
+    def update_preview(self):
+        value = self.preview.value()
+        result = "" if value is None else format_result(value)
+        self.preview_var.set(f"= {result}" if result and result != self.current else "")
+    
     def button_click(self, value):
         if value == 'C':
             # Clear display
             self.current = ""
-            self.display.delete(0, tk.END)
+            self.preview.reset()
+            self.show("")
             
         elif value == '←':
             # Backspace
             self.current = self.current[:-1]
-            self.display.delete(0, tk.END)
-            self.display.insert(tk.END, self.current)
+            self.preview.backspace()
+            if self.error:
+                self.show(self.current)
+            else:
+                self.display.delete(len(self.current))
             
         elif value == '±':
             # Change sign
@@ -73,33 +606,149 @@ class Calculator:
                     self.current = self.current[1:]
                 else:
                     self.current = '-' + self.current
-                self.display.delete(0, tk.END)
-                self.display.insert(tk.END, self.current)
+                self.preview.reset(self.current)
+                self.show(self.current)
             except:
-                self.display.delete(0, tk.END)
-                self.display.insert(tk.END, "Error")
+                self.show("Error")
                 
         elif value == '=':
             # Calculate result
             try:
-                result = str(eval(self.current))
-                self.display.delete(0, tk.END)
-                self.display.insert(tk.END, result)
+                result = format_result(evaluate(self.current, self.backend,
+                                                self.precision))
+                self.show(result)
                 self.current = result
             except:
-                self.display.delete(0, tk.END)
-                self.display.insert(tk.END, "Error")
+                self.show("Error")
                 self.current = ""
+            self.preview.reset(self.current)
                 
         else:
             # Add number or operator to current calculation
             self.current += value
-            self.display.delete(0, tk.END)
-            self.display.insert(tk.END, self.current)
+            self.preview.append(value)
+            if self.error:
+                self.show(self.current)
+            else:
+                self.display.insert(tk.END, value)
+        
+        self.update_preview()
+
+def timed(operation, runs):
+    # Average microseconds per call
+    start = time.perf_counter()
+    for _ in range(runs):
+        operation()
+    return (time.perf_counter() - start) / runs * 1000000
+
+def benchmark_engine(count=20000):
+    # Compare the engine against eval for one expression pressed over and
+    # over, and for expressions that are all different
+    import random
+    rng = random.Random(1)
+    expressions = [f"{rng.randint(1, 999)}*{rng.randint(1, 99)}+{rng.random():.3f}"
+                   f"/{rng.randint(1, 9)}-{rng.randint(1, 999)}%{rng.randint(1, 9)}"
+                   for _ in range(count)]
+    for name, texts in (("repeated", [expressions[0]] * count), ("unique", expressions)):
+        for engine, calculate in (("eval", eval), ("engine", evaluate)):
+            compile_expression.cache_clear()
+            evaluate.cache_clear()
+            values = iter(texts)
+            elapsed = timed(lambda: calculate(next(values)), count)
+            print(f"  {name:8} {engine:6} {elapsed:8.2f} us per expression")
+
+def benchmark_backends(runs=2000):
+    # Cost of each numeric backend, compiling every time and from the cache,
+    # on everyday input and on input that is hard for some backend
+    cases = [
+        ("integers", "123*456+789-12//5"),
+        ("decimals", "0.1+0.2*3.75-1.5/4"),
+        ("percent", "19.99*3+7.5%"),
+        ("big power", "7**2000"),
+        ("long chain", "+".join(f"1/{n}" for n in range(1, 60))),
+        ("big integer chain", "*".join(["987654321"] * 400)),
+    ]
+    for backend in BACKENDS:
+        print(backend)
+        for name, text in cases:
+            cold = timed(lambda: (compile_expression.cache_clear(), evaluate.cache_clear(),
+                                  format_result(evaluate(text, backend))), runs // 10)
+            warm = timed(lambda: format_result(evaluate(text, backend)), runs)
+            print(f"  {name:18} {cold:10.2f} us compiling, {warm:10.2f} us cached")
+
+def benchmark_batch(rows=1000000):
+    # Compare evaluating a formula over columns against a loop that runs the
+    # compiled formula once per row
+    import random
+    text = "price * quantity + price * quantity * tax / 100 - discount"
+    rng = random.Random(1)
+    columns = {name: [rng.uniform(0, 100) for _ in range(rows)]
+               for name in ('price', 'quantity', 'tax', 'discount')}
+    code = compile(text, '<formula>', 'eval')
+    
+    def per_row():
+        return [eval(code, {}, dict(zip(columns, row))) for row in zip(*columns.values())]
+    
+    for name, calculate in (("columns", lambda: evaluate_columns(text, columns)),
+                            ("per row", per_row)):
+        start = time.perf_counter()
+        calculate()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:8} {rows / elapsed:12,.0f} rows/sec")
 
 def main():
+    parser = argparse.ArgumentParser(description="Interactive Calculator")
+    parser.add_argument('--csv', dest='csv_path', metavar='FILE',
+                        help="evaluate --expression for every row of a CSV file "
+                             "with a header, without opening the window")
+    parser.add_argument('--expression',
+                        help="formula over the CSV columns, e.g. price*quantity")
+    parser.add_argument('--output', metavar='FILE',
+                        help="where to write the rows with a result column "
+                             "(default: standard output)")
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help="rows held in memory at a time for --csv")
+    parser.add_argument('--backend', choices=list(BACKENDS), default='float',
+                        help="number type for results: binary floats, decimals "
+                             "or exact fractions")
+    parser.add_argument('--precision', type=int, default=28,
+                        help="significant digits for the decimal backend")
+    parser.add_argument('--benchmark', choices=['engine', 'batch', 'backends'],
+                        help="time the expression engine against eval, column "
+                             "evaluation against one row at a time, or each "
+                             "numeric backend")
+    args = parser.parse_args()
+    
+    if args.benchmark == 'engine':
+        benchmark_engine()
+        return
+    if args.benchmark == 'backends':
+        benchmark_backends()
+        return
+    if args.benchmark == 'batch':
+        benchmark_batch()
+        return
+    
+    if args.csv_path:
+        if not args.expression:
+            parser.error("--csv needs --expression")
+        start = time.perf_counter()
+        with open(args.csv_path, 'r', newline='') as source:
+            target = open(args.output, 'w', newline='') if args.output else sys.stdout
+            try:
+                rows, failed = evaluate_csv(args.expression, source, target,
+                                            args.chunk_size)
+            except (SyntaxError, ValueError, ArithmeticError) as error:
+                sys.exit(f"{args.csv_path}: {error}")
+            finally:
+                if args.output:
+                    target.close()
+        print(f"Evaluated {rows} rows ({failed} failed) in "
+              f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+        return
+    
     root = tk.Tk()
-    app = Calculator(root)
+    app = Calculator(root, args.backend, args.precision)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,17 +1,705 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import argparse
+import csv
 import json
+import mmap
+import os
 import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+PHONE_PATTERN = re.compile(r'^\+?1?\d{9,15}$')
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+CONTROL_PATTERN = re.compile(r'[\x00-\x1f\x7f]')
+
+def validate_contact(name, phone, email):
+    # Returns an error message, or None if the contact is valid
+    if not name:
+        return "Name is required!"
+    if CONTROL_PATTERN.search(name):
+        return "Name cannot contain line breaks or control characters!"
+    if not phone or not PHONE_PATTERN.match(phone):
+        return "Invalid phone number!"
+    if email and not EMAIL_PATTERN.match(email):
+        return "Invalid email format!"
+    return None
+
+def write_json(path, data):
+    # Write to a temp file first so a crash never leaves a torn file
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(data, file, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+class BackgroundWriter:
+    # Writes JSON files on a worker thread. Saves scheduled within the
+    # debounce window collapse into one write of the latest data. The
+    # snapshot function runs on the worker, so it must copy what it reads
+    # with a single C-level call (list(), dict()) to stay consistent. A
+    # failed write is reported and the worker carries on; flush() and
+    # close() then raise the error.
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.pending = {}
+        self.error = None
+        self.writing = False
+        self.flushing = False
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def schedule(self, path, snapshot, write=write_json):
+        with self.condition:
+            self.pending[path] = (snapshot, write)
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                
+                # Let a burst of changes settle, unless someone is waiting
+                deadline = time.monotonic() + self.delay
+                while (not self.closed and not self.flushing
+                       and time.monotonic() < deadline):
+                    self.condition.wait(deadline - time.monotonic())
+                pending, self.pending = self.pending, {}
+                self.writing = True
+            
+            try:
+                for path, (snapshot, write) in pending.items():
+                    try:
+                        write(path, snapshot())
+                    except Exception as error:
+                        print(f"Could not save {path}: {error}", file=sys.stderr)
+                        self.error = error
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def raise_error(self):
+        # Raises the last failed write, once
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        # Block until everything scheduled so far is on disk
+        with self.condition:
+            self.flushing = True
+            self.condition.notify_all()
+            while self.pending or self.writing:
+                self.condition.wait()
+            self.flushing = False
+        self.raise_error()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.raise_error()
+
+def read_csv_contacts(file):
+    # Yields (line number, name, phone, email, address) from a CSV file with
+    # name, phone, email and address columns
+    reader = csv.DictReader(file)
+    reader.fieldnames = [field.strip().lower() for field in reader.fieldnames or []]
+    for record in reader:
+        yield (reader.line_num, (record.get('name') or '').strip(),
+               (record.get('phone') or '').strip(), (record.get('email') or '').strip(),
+               (record.get('address') or '').strip())
+
+def read_vcard_contacts(file):
+    # Yields the same tuples from a vCard file, numbered by BEGIN:VCARD line.
+    # Only the first TEL and EMAIL of a card are kept.
+    def lines():
+        # Unfold continuation lines, which start with a space or tab
+        pending = None
+        for line_number, line in enumerate(file, 1):
+            line = line.rstrip('\r\n')
+            if line[:1] in (' ', '\t') and pending is not None:
+                pending = (pending[0], pending[1] + line[1:])
+                continue
+            if pending is not None:
+                yield pending
+            pending = (line_number, line)
+        if pending is not None:
+            yield pending
+    
+    card = None
+    start = 0
+    for line_number, line in lines():
+        key, _, value = line.partition(':')
+        key = key.split(';')[0].upper()
+        if key == 'BEGIN' and value.upper() == 'VCARD':
+            card = {}
+            start = line_number
+        elif key == 'END' and card is not None:
+            yield (start, card.get('FN', '').strip(), card.get('TEL', '').strip(),
+                   card.get('EMAIL', '').strip(), card.get('ADR', '').strip())
+            card = None
+        elif card is not None and key in ('FN', 'TEL', 'EMAIL', 'ADR'):
+            if key == 'ADR':
+                value = ', '.join(part for part in value.split(';') if part)
+            card.setdefault(key, value)
+
+def validate_batch(records):
+    # Runs in worker processes for big imports, so it must stay module level
+    accepted = []
+    rejected = []
+    for line_number, name, phone, email, address in records:
+        error = validate_contact(name, phone, email)
+        if error:
+            rejected.append((line_number, error))
+        else:
+            accepted.append((line_number, name, phone, email, address))
+    return accepted, rejected
+
+def import_contacts(contacts, path, workers=None, batch_size=10000):
+    # Streams a CSV or vCard file into contacts, validating batches in a
+    # process pool for big files. Returns (imported, rejected) where
+    # rejected is a list of (line number, reason). Nothing is written here.
+    if workers is None:
+        workers = os.cpu_count() if os.path.getsize(path) > 64 * 1024 * 1024 else 1
+    imported = 0
+    rejected = []
+    
+    def accept(result):
+        nonlocal imported
+        batch_accepted, batch_rejected = result
+        rejected.extend(batch_rejected)
+        for line_number, name, phone, email, address in batch_accepted:
+            if name in contacts:
+                rejected.append((line_number, f"Contact '{name}' already exists!"))
+                continue
+            contacts[name] = {'phone': phone, 'email': email, 'address': address}
+            imported += 1
+    
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        if path.lower().endswith(('.vcf', '.vcard')):
+            records = read_vcard_contacts(file)
+        else:
+            records = read_csv_contacts(file)
+        batches = iter(lambda: list(islice(records, batch_size)), [])
+        
+        if workers <= 1:
+            for batch in batches:
+                accept(validate_batch(batch))
+        else:
+            # Keep only a few batches in flight so memory stays bounded, and
+            # take results in file order so the first duplicate wins
+            with ProcessPoolExecutor(workers) as pool:
+                in_flight = deque()
+                for batch in batches:
+                    in_flight.append(pool.submit(validate_batch, batch))
+                    if len(in_flight) >= workers * 2:
+                        accept(in_flight.popleft().result())
+                while in_flight:
+                    accept(in_flight.popleft().result())
+    return imported, rejected
+
+def merge_contact_index(names, entries, changes):
+    # Applies changed contacts (name -> entry, or None once deleted) to the
+    # sorted name and entry lists, returning new lists
+    if not changes:
+        return names, entries
+    merged = [(name, entry) for name, entry in zip(names, entries) if name not in changes]
+    merged += sorted((name, entry) for name, entry in changes.items() if entry is not None)
+    merged.sort()
+    return [name for name, entry in merged], [entry for name, entry in merged]
+
+def write_contact_index(path, snapshot):
+    # A count line, the sorted names one per line as JSON strings (so no
+    # name can break a line), then each name's phone, shard, offset, length
+    # and duplicate detection record in the same order, separated by \x1f which cannot be typed
+    # into the form
+    names, entries = merge_contact_index(*snapshot)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8', newline='') as file:
+        file.write(f"{len(names)} json\n")
+        file.writelines(f"{json.dumps(name)}\n" for name in names)
+        file.writelines(f"{entry}\n" for entry in entries)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+class ShardedContacts(MutableMapping):
+    # Contacts kept in append-only shard files chosen by the first letter of
+    # the name, plus an index of name -> phone, record location and what
+    # duplicate detection needs. Startup
+    # only splits the index file into sorted name and entry lists, looked up
+    # by bisection; details are read from the memory-mapped shard when asked
+    # for. Changes since the lists were built are kept in a dict on the side.
+    def __init__(self, directory='contacts', writer=None, import_path='contacts.json'):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index')
+        self.writer = writer
+        self.names = []
+        self.entries = []
+        self.changes = {}
+        self.count = 0
+        self.files = {}
+        self.appenders = {}
+        self.maps = {}
+        
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+            try:
+                with open(import_path, 'r') as file:
+                    contacts = json.load(file)
+            except FileNotFoundError:
+                contacts = {}
+            for name, details in contacts.items():
+                self[name] = details
+            self.save(wait=True)
+            return
+        
+        # Appends go to the newest generation of each shard
+        for file_key in self.file_keys():
+            shard, _, generation = file_key.partition('.')
+            current = self.files.get(shard, shard)
+            if int(generation or 0) >= int(current.partition('.')[2] or 0):
+                self.files[shard] = file_key
+        
+        try:
+            with open(self.index_path, 'r', encoding='utf-8', newline='') as file:
+                lines = file.read().split('\n')
+        except FileNotFoundError:
+            return
+        count, _, encoding = lines[0].partition(' ')
+        self.count = int(count)
+        names = lines[1:self.count + 1]
+        if encoding == 'json':
+            # One json.loads for all names is far faster than one per name
+            names = json.loads(f"[{','.join(names)}]")
+        self.names = names
+        self.entries = lines[self.count + 1:2 * self.count + 1]
+
+    def file_keys(self):
+        return [filename[len('shard-'):-len('.jsonl')]
+                for filename in os.listdir(self.directory)
+                if filename.startswith('shard-') and filename.endswith('.jsonl')]
+
+    def shard_path(self, file_key):
+        return os.path.join(self.directory, f"shard-{file_key}.jsonl")
+
+    def entry(self, name):
+        if name in self.changes:
+            return self.changes[name]
+        position = bisect_left(self.names, name)
+        if position < len(self.names) and self.names[position] == name:
+            return self.entries[position]
+        return None
+
+    def merge(self):
+        self.names, self.entries = merge_contact_index(self.names, self.entries,
+                                                       self.changes)
+        self.changes = {}
+
+    def phone(self, name):
+        entry = self.entry(name)
+        if entry is None:
+            raise KeyError(name)
+        return entry.split('\x1f', 1)[0]
+
+    def duplicate_records(self):
+        # (name, blocking_record) of every contact, from the index alone
+        self.merge()
+        for name, entry in zip(self.names, self.entries):
+            fields = entry.split('\x1f')
+            if len(fields) > 4:
+                yield name, tuple(fields[4:7])
+            else:
+                # Written before the index kept these
+                yield name, blocking_record(name, fields[0], self[name]['email'])
+
+    def __getitem__(self, name):
+        entry = self.entry(name)
+        if entry is None:
+            raise KeyError(name)
+        phone, file_key, offset, length = entry.split('\x1f')[:4]
+        offset = int(offset)
+        end = offset + int(length)
+        data = self.maps.get(file_key)
+        if data is None or len(data) < end:
+            if file_key in self.appenders:
+                self.appenders[file_key].flush()
+            if data is not None:
+                data.close()
+            with open(self.shard_path(file_key), 'rb') as file:
+                data = self.maps[file_key] = mmap.mmap(file.fileno(), 0,
+                                                       access=mmap.ACCESS_READ)
+        return json.loads(data[offset:end])
+
+    def __setitem__(self, name, details):
+        # Append the record to its shard and point the index at it
+        key = name[:1].lower()
+        shard = f"{ord(key):x}" if key.isalnum() else '_'
+        file_key = self.files.setdefault(shard, shard)
+        appender = self.appenders.get(file_key)
+        if appender is None:
+            appender = self.appenders[file_key] = open(self.shard_path(file_key), 'ab')
+        record = json.dumps(details).encode('utf-8') + b'\n'
+        offset = appender.tell()
+        appender.write(record)
+        if self.entry(name) is None:
+            self.count += 1
+        blocking = '\x1f'.join(CONTROL_PATTERN.sub('', field) for field in
+                                blocking_record(name, details['phone'], details['email']))
+        self.changes[name] = (f"{details['phone']}\x1f{file_key}\x1f{offset}"
+                              f"\x1f{len(record)}\x1f{blocking}")
+
+    def __delitem__(self, name):
+        if self.entry(name) is None:
+            raise KeyError(name)
+        self.changes[name] = None
+        self.count -= 1
+
+    def __contains__(self, name):
+        return self.entry(name) is not None
+
+    def __iter__(self):
+        self.merge()
+        return iter(self.names)
+
+    def __len__(self):
+        return self.count
+
+    def save(self, wait=False):
+        # The lists are replaced rather than changed in place, so only the
+        # changes need copying for the writer thread
+        for appender in self.appenders.values():
+            appender.flush()
+        snapshot = (self.names, self.entries, dict(self.changes))
+        if self.writer is None or wait:
+            write_contact_index(self.index_path, snapshot)
+        else:
+            self.writer.schedule(self.index_path, lambda: snapshot, write_contact_index)
+
+    def compact(self):
+        # Copy the live records of mostly-dead shard files into a new
+        # generation, and only delete the old files once the index has
+        # switched over to the new ones
+        self.merge()
+        live = {}
+        for name, entry in zip(self.names, self.entries):
+            phone, file_key, offset, length = entry.split('\x1f')[:4]
+            live.setdefault(file_key, []).append((name, int(length)))
+        
+        stale = []
+        for file_key in self.file_keys():
+            records = live.get(file_key, [])
+            size = os.path.getsize(self.shard_path(file_key))
+            if records and size <= 2 * sum(length for name, length in records) + 4096:
+                continue
+            stale.append(file_key)
+            shard, _, generation = file_key.partition('.')
+            if self.files.get(shard) == file_key:
+                self.files[shard] = f"{shard}.{int(generation or 0) + 1}"
+            for name, length in records:
+                self[name] = self[name]
+        
+        self.save(wait=True)
+        for file_key in stale:
+            if file_key in self.appenders:
+                self.appenders.pop(file_key).close()
+            if file_key in self.maps:
+                self.maps.pop(file_key).close()
+            os.remove(self.shard_path(file_key))
+
+    def close(self):
+        # Let any scheduled index write finish before compacting
+        if self.writer is not None:
+            self.writer.flush()
+        self.compact()
+        for appender in self.appenders.values():
+            appender.close()
+        for data in self.maps.values():
+            data.close()
+        self.appenders.clear()
+        self.maps.clear()
+
+class ContactIndex:
+    # Search index over contact names and phones. Every query matches
+    # anywhere in the name or phone: queries of three or more characters via
+    # a trigram index, shorter ones via an index of every one and two
+    # character substring. A query that extends the previous one narrows the
+    # previous hits instead of starting over, so each keystroke can only
+    # shrink the results.
+    def __init__(self, entries=()):
+        self.trigrams = {}
+        self.shorts = {}
+        self.names = {}
+        self.phones = {}
+        self.last_term = None
+        self.last_hits = None
+        for name, phone in entries:
+            self.add(name, phone)
+
+    def keys(self, name, phone):
+        trigrams = {text[i:i + 3] for text in (name, phone)
+                    for i in range(len(text) - 2)}
+        shorts = {text[i:i + size] for text in (name, phone)
+                  for size in (1, 2) for i in range(len(text) - size + 1)}
+        return trigrams, shorts
+
+    def add(self, key, phone):
+        name = key.lower()
+        phone = phone.lower()
+        self.names[key] = name
+        self.phones[key] = phone
+        trigrams, shorts = self.keys(name, phone)
+        for trigram in trigrams:
+            self.trigrams.setdefault(trigram, set()).add(key)
+        for short in shorts:
+            self.shorts.setdefault(short, set()).add(key)
+        self.last_term = None
+
+    def remove(self, key):
+        trigrams, shorts = self.keys(self.names.pop(key), self.phones.pop(key))
+        for index, grams in ((self.trigrams, trigrams), (self.shorts, shorts)):
+            for gram in grams:
+                keys = index[gram]
+                keys.discard(key)
+                if not keys:
+                    del index[gram]
+        self.last_term = None
+
+    def matches(self, key, term):
+        return term in self.names[key] or term in self.phones[key]
+
+    def grams(self, term):
+        return {term[i:i + 3] for i in range(len(term) - 2)}
+
+    def search(self, term):
+        # Returns the set of matching keys, or None when every contact matches
+        if not term:
+            return None
+        if len(term) < 3:
+            # Short terms are indexed directly, so they are exact lookups
+            hits = set(self.shorts.get(term, ()))
+            self.last_term = term
+            self.last_hits = hits
+            return hits
+        
+        last = self.last_term
+        if last is not None and last in term:
+            # Every hit for the longer term was a hit for the shorter one
+            hits = self.last_hits
+            grams = self.grams(term) - self.grams(last)
+        else:
+            hits = None
+            grams = self.grams(term)
+        
+        for gram_keys in sorted((self.trigrams.get(gram, set()) for gram in grams),
+                                key=len):
+            hits = set(gram_keys) if hits is None else hits & gram_keys
+            if not hits:
+                break
+        
+        if len(term) > 3:
+            # Trigrams can match out of order, so confirm the hits
+            names = self.names
+            phones = self.phones
+            hits = {key for key in hits if term in names[key] or term in phones[key]}
+        
+        self.last_term = term
+        self.last_hits = hits
+        return hits
+
+SOUNDEX_CODES = {letter: str(code) for code, letters in
+                 enumerate(('aehiouwy', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r'))
+                 for letter in letters}
+
+def soundex(word):
+    # Four character phonetic code, so "Smith" and "Smyth" block together
+    if not word:
+        return ''
+    codes = [SOUNDEX_CODES.get(letter, '') for letter in word]
+    digits = []
+    last = codes[0]
+    for letter, code in zip(word[1:], codes[1:]):
+        if code and code != last and code != '0':
+            digits.append(code)
+        if letter not in 'hw':
+            last = code
+    return (word[0].upper() + ''.join(digits) + '000')[:4]
+
+def normalize_phone(phone):
+    digits = re.sub(r'\D', '', phone)
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits
+
+def normalize_email(email):
+    # Case and +tags don't change the mailbox
+    local, _, domain = email.strip().lower().partition('@')
+    if not domain:
+        return ''
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+def name_tokens(name):
+    return tuple(re.findall(r'[^\W\d_]+', name.lower()))
+
+def blocking_record(name, phone, email):
+    # What duplicate detection keeps per contact: the normalized phone and
+    # email, and a phonetic code of the surname plus first initial
+    tokens = name_tokens(name)
+    code = soundex(tokens[-1]) + tokens[0][0] if tokens else ''
+    return normalize_phone(phone), normalize_email(email), code
+
+def duplicate_records(contacts):
+    # (name, blocking_record) of every contact; sharded contacts keep these
+    # in their index, so no shard record is read
+    if isinstance(contacts, ShardedContacts):
+        return contacts.duplicate_records()
+    return ((name, blocking_record(name, details['phone'], details['email']))
+            for name, details in contacts.items())
+
+class DuplicateIndex:
+    # Finds likely duplicate contacts without comparing every pair. Each
+    # contact goes into blocks keyed by the parts of its blocking_record:
+    # normalized phone, normalized email and name code; only contacts
+    # sharing a block are compared. Blocks bigger than BLOCK_LIMIT (a very
+    # common name) only compare neighbours in name order. Built from
+    # (name, blocking_record) pairs.
+    BLOCK_LIMIT = 50
+    
+    def __init__(self, records=()):
+        self.records = {}
+        self.blocks = {}
+        for name, record in records:
+            self.add_record(name, record)
+
+    def keys(self, record):
+        phone, email, code = record
+        keys = []
+        if phone:
+            keys.append('p' + phone)
+        if email:
+            keys.append('e' + email)
+        if code:
+            keys.append('n' + code)
+        return keys
+
+    def add(self, name, phone, email):
+        self.add_record(name, blocking_record(name, phone, email))
+
+    def add_record(self, name, record):
+        self.records[name] = record
+        for key in self.keys(record):
+            self.blocks.setdefault(key, set()).add(name)
+
+    def compared(self, name, record=None):
+        # Name words, phone and email, as compare() takes them
+        phone, email, code = self.records[name] if record is None else record
+        return name_tokens(name), phone, email
+
+    def remove(self, name):
+        for key in self.keys(self.records.pop(name)):
+            block = self.blocks[key]
+            block.discard(name)
+            if not block:
+                del self.blocks[key]
+
+    def names_match(self, a, b):
+        # Same surname, and given names that agree where both have them,
+        # allowing an initial for a full name ("J. Smith", "John Smith")
+        if not a or not b or a[-1] != b[-1]:
+            return False
+        for x, y in zip(a[:-1], b[:-1]):
+            if x != y and not ((len(x) == 1 or len(y) == 1) and x[0] == y[0]):
+                return False
+        return True
+
+    def compare(self, a, b):
+        # Returns why two records look like the same person, or None
+        shared = [field for field, x, y in (('phone', a[1], b[1]), ('email', a[2], b[2]))
+                  if x and x == y]
+        if self.names_match(a[0], b[0]):
+            if shared:
+                return "same name and " + " and ".join(shared)
+            if a[0] == b[0]:
+                return "same name"
+        elif len(shared) == 2:
+            return "same phone and email"
+        return None
+
+    def find(self, name, phone, email):
+        # On-add check: (existing name, reason) pairs for a contact not yet added
+        record = blocking_record(name, phone, email)
+        candidates = set()
+        for key in self.keys(record):
+            candidates.update(self.blocks.get(key, ()))
+        candidates.discard(name)
+        matches = []
+        compared = self.compared(name, record)
+        for other in sorted(candidates):
+            reason = self.compare(compared, self.compared(other))
+            if reason:
+                matches.append((other, reason))
+        return matches
+
+    def pairs(self, block):
+        if len(block) <= self.BLOCK_LIMIT:
+            block = sorted(block)
+            for i, a in enumerate(block):
+                for b in block[i + 1:]:
+                    yield a, b
+        else:
+            block = sorted(block, key=lambda name: (name_tokens(name), name))
+            yield from zip(block, block[1:])
+
+    def report(self):
+        # Batch pass over the whole book: sorted (name, name, reason) triples
+        seen = set()
+        duplicates = []
+        for block in self.blocks.values():
+            for pair in self.pairs(block):
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                reason = self.compare(self.compared(pair[0]), self.compared(pair[1]))
+                if reason:
+                    duplicates.append((*pair, reason))
+        duplicates.sort()
+        return duplicates
 
 class ContactManager:
-    def __init__(self, root):
+    def __init__(self, root, writer=None, sharded=False):
         self.root = root
         self.root.title("Contact Management System")
         self.root.geometry("800x600")
         
-        # Load contacts from file
+        # Load contacts from file, or just the shard index when sharded; saves
+        # go through the writer thread if given
+        self.writer = writer
+        self.sharded = sharded
         self.contacts = self.load_contacts()
         
+        # Search and duplicate indexes, built when first needed
+        self.index = None
+        self.duplicates = None
+        
+        # Contact names in sorted order, and the names shown in each listbox row
+        self.sorted_names = sorted(self.contacts)
+        self.rows = []
+        
         # Create main container
         self.main_container = ttk.Frame(root, padding="20")
         self.main_container.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -94,6 +782,8 @@ class ContactManager:
         self.update_contact_list()
         
     def load_contacts(self):
+        if self.sharded:
+            return ShardedContacts('contacts', self.writer)
         try:
             with open('contacts.json', 'r') as file:
                 return json.load(file)
@@ -101,28 +791,23 @@ class ContactManager:
             return {}
             
     def save_contacts(self):
-        with open('contacts.json', 'w') as file:
-            json.dump(self.contacts, file, indent=2)
+        if self.sharded:
+            self.contacts.save()
+            return
+        if self.writer is None:
+            write_json('contacts.json', self.contacts)
+            return
+        # Contact values are replaced, never mutated, so a shallow copy is a
+        # consistent snapshot
+        self.writer.schedule('contacts.json', lambda: dict(self.contacts))
             
     def validate_fields(self):
-        # Validate name
-        name = self.name_var.get().strip()
-        if not name:
-            self.status_var.set("Name is required!")
-            return False
-            
-        # Validate phone
-        phone = self.phone_var.get().strip()
-        if not phone or not re.match(r'^\+?1?\d{9,15}$', phone):
-            self.status_var.set("Invalid phone number!")
-            return False
-            
-        # Validate email
-        email = self.email_var.get().strip()
-        if email and not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
-            self.status_var.set("Invalid email format!")
+        error = validate_contact(self.name_var.get().strip(),
+                                 self.phone_var.get().strip(),
+                                 self.email_var.get().strip())
+        if error:
+            self.status_var.set(error)
             return False
-            
         return True
             
     def add_contact(self):
@@ -134,14 +819,29 @@ class ContactManager:
             self.status_var.set("Contact already exists!")
             return
             
+        phone = self.phone_var.get().strip()
+        email = self.email_var.get().strip()
+        matches = self.duplicate_index().find(name, phone, email)
+        if matches:
+            other, reason = matches[0]
+            if not messagebox.askyesno("Possible Duplicate",
+                                       f"'{name}' looks like '{other}' ({reason}). "
+                                       "Add it anyway?"):
+                self.status_var.set("Contact not added.")
+                return
+            
         self.contacts[name] = {
-            'phone': self.phone_var.get().strip(),
-            'email': self.email_var.get().strip(),
+            'phone': phone,
+            'email': email,
             'address': self.address_var.get().strip()
         }
+        if self.index is not None:
+            self.index.add(name, phone)
+        self.duplicates.add(name, phone, email)
+        insort(self.sorted_names, name)
         
         self.save_contacts()
-        self.update_contact_list()
+        self.insert_row(name)
         self.clear_fields()
         self.status_var.set(f"Contact '{name}' added successfully!")
         
@@ -154,7 +854,7 @@ class ContactManager:
             self.status_var.set("Please select a contact to update!")
             return
             
-        old_name = self.contact_listbox.get(selection[0]).split(" (")[0]
+        old_name = self.rows[selection[0]]
         new_name = self.name_var.get().strip()
         
         if old_name != new_name and new_name in self.contacts:
@@ -164,16 +864,27 @@ class ContactManager:
         # Remove old contact if name changed
         if old_name != new_name:
             del self.contacts[old_name]
+            del self.sorted_names[bisect_left(self.sorted_names, old_name)]
+            insort(self.sorted_names, new_name)
             
         # Update contact
+        phone = self.phone_var.get().strip()
+        email = self.email_var.get().strip()
         self.contacts[new_name] = {
-            'phone': self.phone_var.get().strip(),
-            'email': self.email_var.get().strip(),
+            'phone': phone,
+            'email': email,
             'address': self.address_var.get().strip()
         }
+        if self.index is not None:
+            self.index.remove(old_name)
+            self.index.add(new_name, phone)
+        if self.duplicates is not None:
+            self.duplicates.remove(old_name)
+            self.duplicates.add(new_name, phone, email)
         
         self.save_contacts()
-        self.update_contact_list()
+        self.delete_row(old_name)
+        self.insert_row(new_name)
         self.status_var.set(f"Contact '{new_name}' updated successfully!")
         
     def delete_contact(self):
@@ -182,11 +893,16 @@ class ContactManager:
             self.status_var.set("Please select a contact to delete!")
             return
             
-        name = self.contact_listbox.get(selection[0]).split(" (")[0]
+        name = self.rows[selection[0]]
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{name}'?"):
             del self.contacts[name]
+            del self.sorted_names[bisect_left(self.sorted_names, name)]
+            if self.index is not None:
+                self.index.remove(name)
+            if self.duplicates is not None:
+                self.duplicates.remove(name)
             self.save_contacts()
-            self.update_contact_list()
+            self.delete_row(name)
             self.clear_fields()
             self.status_var.set(f"Contact '{name}' deleted successfully!")
             
@@ -201,7 +917,7 @@ class ContactManager:
     def on_select(self, event):
         selection = self.contact_listbox.curselection()
         if selection:
-            name = self.contact_listbox.get(selection[0]).split(" (")[0]
+            name = self.rows[selection[0]]
             contact = self.contacts[name]
             
             self.name_var.set(name)
@@ -213,18 +929,114 @@ class ContactManager:
         search_term = self.search_var.get().lower()
         self.update_contact_list(search_term)
         
+    def phone_of(self, name):
+        # The shard index keeps phones, so listing never touches the shards
+        if self.sharded:
+            return self.contacts.phone(name)
+        return self.contacts[name]['phone']
+        
+    def row_text(self, name):
+        return f"{name} ({self.phone_of(name)})"
+        
+    def search_index(self):
+        if self.index is None:
+            self.index = ContactIndex((name, self.phone_of(name)) for name in self.contacts)
+        return self.index
+        
+    def duplicate_index(self):
+        if self.duplicates is None:
+            self.duplicates = DuplicateIndex(duplicate_records(self.contacts))
+        return self.duplicates
+        
+    def insert_row(self, name):
+        # Show a new contact in its sorted place if it matches the search
+        search_term = self.search_var.get().lower()
+        if search_term and not self.search_index().matches(name, search_term):
+            return
+        row = bisect_left(self.rows, name)
+        self.rows.insert(row, name)
+        self.contact_listbox.insert(row, self.row_text(name))
+        
+    def delete_row(self, name):
+        row = bisect_left(self.rows, name)
+        if row < len(self.rows) and self.rows[row] == name:
+            del self.rows[row]
+            self.contact_listbox.delete(row)
+        
     def update_contact_list(self, search_term=""):
-        self.contact_listbox.delete(0, tk.END)
+        hits = self.search_index().search(search_term) if search_term else None
+        if hits is None:
+            self.rows = list(self.sorted_names)
+        elif len(hits) * 8 < len(self.sorted_names):
+            self.rows = sorted(hits)
+        else:
+            # Cheaper to walk the sorted names than to sort most of them
+            self.rows = [name for name in self.sorted_names if name in hits]
         
-        for name, details in sorted(self.contacts.items()):
-            if (search_term in name.lower() or 
-                search_term in details['phone'].lower()):
-                self.contact_listbox.insert(tk.END, f"{name} ({details['phone']})")
+        self.contact_listbox.delete(0, tk.END)
+        self.contact_listbox.insert(tk.END, *map(self.row_text, self.rows))
 
 def main():
+    parser = argparse.ArgumentParser(description="Contact Management System")
+    parser.add_argument('--storage', choices=['json', 'sharded'], default='json',
+                        help="keep contacts in contacts.json, or in shard files "
+                             "under contacts/ read on demand")
+    parser.add_argument('--import', dest='import_path', metavar='FILE',
+                        help="add contacts from a CSV or vCard (.vcf) file to "
+                             "the store, without opening the window")
+    parser.add_argument('--dedup', action='store_true',
+                        help="list likely duplicate contacts, without opening "
+                             "the window")
+    parser.add_argument('--workers', type=int,
+                        help="validation processes for --import (default: all "
+                             "cores for files over 64 MB)")
+    args = parser.parse_args()
+    
+    sharded = args.storage == 'sharded'
+    if args.import_path or args.dedup:
+        if sharded:
+            contacts = ShardedContacts('contacts')
+        else:
+            try:
+                with open('contacts.json', 'r') as file:
+                    contacts = json.load(file)
+            except FileNotFoundError:
+                contacts = {}
+    
+    if args.dedup:
+        start = time.perf_counter()
+        duplicates = DuplicateIndex(duplicate_records(contacts))
+        report = duplicates.report()
+        for name, other, reason in report:
+            print(f"{name} ~ {other}: {reason}")
+        print(f"Found {len(report)} likely duplicates among {len(contacts)} "
+              f"contacts in {time.perf_counter() - start:.1f}s")
+        return
+    
+    if args.import_path:
+        start = time.perf_counter()
+        imported, rejected = import_contacts(contacts, args.import_path, args.workers)
+        for line_number, reason in rejected:
+            print(f"{args.import_path}:{line_number}: rejected: {reason}",
+                  file=sys.stderr)
+        if sharded:
+            contacts.close()
+        elif imported:
+            write_json('contacts.json', contacts)
+        print(f"Imported {imported} contacts, rejected {len(rejected)}, "
+              f"in {time.perf_counter() - start:.1f}s")
+        return
+    
+    writer = BackgroundWriter()
     root = tk.Tk()
-    app = ContactManager(root)
-    root.mainloop()
+    app = ContactManager(root, writer, sharded)
+    try:
+        root.mainloop()
+    finally:
+        # Flush any debounced save before the process exits
+        if sharded:
+            app.contacts.close()
+        writer.close()
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,449 @@
 import tkinter as tk
 from tkinter import ttk
+import argparse
+import hashlib
+import math
+import mmap
+import operator
+import os
 import random
+import re
+import secrets
+import shutil
 import string
+import struct
+import sys
+import tempfile
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import compress, filterfalse, islice, repeat
 import pyperclip  # For clipboard functionality
 
+def character_classes(uppercase=True, lowercase=True, digits=True, symbols=True):
+    # The selected character classes, each of which a password must use
+    return [chars for chars, selected in ((string.ascii_uppercase, uppercase),
+                                          (string.ascii_lowercase, lowercase),
+                                          (string.digits, digits),
+                                          (string.punctuation, symbols))
+            if selected]
+
+def character_pool(uppercase=True, lowercase=True, digits=True, symbols=True):
+    return ''.join(character_classes(uppercase, lowercase, digits, symbols))
+
+@lru_cache(maxsize=1024)
+def covering_count(length, sizes):
+    # Number of strings of this length over classes of these sizes that use
+    # every class, by inclusion-exclusion over the classes left out
+    total = 0
+    for left_out in range(1 << len(sizes)):
+        size = sum(count for i, count in enumerate(sizes) if not left_out >> i & 1)
+        total += (-1) ** bin(left_out).count('1') * size ** length
+    return total
+
+@lru_cache(maxsize=256)
+def class_count_weights(length, sizes):
+    # Cumulative number of valid passwords by how many characters the first
+    # class gets: choose its positions, fill them from the class, and cover
+    # the remaining classes with the other positions
+    first, rest = sizes[0], sizes[1:]
+    cumulative = []
+    total = 0
+    for count in range(1, length - len(rest) + 1):
+        total += math.comb(length, count) * first ** count * covering_count(length - count, rest)
+        cumulative.append(total)
+    return cumulative
+
+@lru_cache(maxsize=None)
+def byte_table(chars):
+    # bytes.translate arguments that turn random bytes into characters of
+    # chars: bytes at or above the largest multiple of len(chars) are deleted
+    # (rejection sampling, so every character is equally likely) and the
+    # rest become chars[byte % len(chars)]
+    if not 0 < len(chars) <= 256 or not chars.isascii():
+        raise ValueError("the character pool must be 1 to 256 ASCII characters")
+    size = len(chars)
+    limit = 256 - 256 % size
+    pool = chars.encode('ascii')
+    return bytes(pool[byte % size] for byte in range(256)), bytes(range(limit, 256)), limit
+
+def random_chars(chars, count):
+    # count random characters of chars as bytes, from os.urandom in bulk
+    table, rejected, limit = byte_table(chars)
+    parts = []
+    needed = count
+    while needed > 0:
+        # Ask for enough bytes that one draw usually covers the rejections
+        part = os.urandom(needed * 256 // limit + 64).translate(table, rejected)
+        parts.append(part)
+        needed -= len(part)
+    return b''.join(parts)[:count]
+
+def random_indices(bounds):
+    # A uniform random int below each bound (at most 256), taken from one
+    # os.urandom call a byte at a time with rejection
+    data = os.urandom(2 * len(bounds) + 16)
+    position = 0
+    indices = []
+    for bound in bounds:
+        limit = 256 - 256 % bound
+        while True:
+            if position == len(data):
+                data = os.urandom(len(bounds) + 16)
+                position = 0
+            byte = data[position]
+            position += 1
+            if byte < limit:
+                indices.append(byte % bound)
+                break
+    return indices
+
+# Longer passwords are drawn whole and redrawn if a class is missing: the
+# exact counting below grows too fast with length, while the chance of a
+# redraw shrinks towards nothing
+CONSTRUCTIVE_LENGTH = 64
+
+def constrained_password(length, classes):
+    # A password using every class, uniform over all such passwords. How
+    # many characters each class gets is drawn with probability proportional
+    # to the number of valid passwords with those counts; the characters are
+    # then drawn from their classes and shuffled into place. Each valid
+    # password comes from exactly one set of counts and one arrangement, so
+    # all of them are equally likely.
+    if length < len(classes):
+        raise ValueError(f"length must be at least {len(classes)} to use every "
+                         f"character type")
+    if length > CONSTRUCTIVE_LENGTH:
+        pool = ''.join(classes)
+        while True:
+            password = random_chars(pool, length).decode('ascii')
+            if all(not set(password).isdisjoint(chars) for chars in classes):
+                return password
+    sizes = tuple(map(len, classes))
+    chars = bytearray(length)
+    position = 0
+    for index, pool in enumerate(classes):
+        cumulative = class_count_weights(length - position, sizes[index:])
+        count = bisect_right(cumulative, secrets.randbelow(cumulative[-1])) + 1
+        chars[position:position + count] = random_chars(pool, count)
+        position += count
+    
+    # Fisher-Yates shuffle
+    if length <= 256:
+        swaps = random_indices(range(length, 1, -1))
+    else:
+        swaps = [secrets.randbelow(bound) for bound in range(length, 1, -1)]
+    for i, j in zip(range(length - 1, 0, -1), swaps):
+        chars[i], chars[j] = chars[j], chars[i]
+    return chars.decode('ascii')
+
+# Rounds in a row that may come back empty before generation gives up, the
+# same number of tries the GUI makes
+MAX_REDRAWS = 100
+
+class BulkPasswordGenerator:
+    # Draws passwords from os.urandom in large blocks with random_chars, and
+    # cuts them out of the result with strided slice copies, so no Python
+    # code runs per character or per password. With several classes,
+    # passwords missing one are dropped: the class bits of each position are
+    # ORed together as big ints, and the passwords whose mask lacks a bit are
+    # filtered out with itertools.compress, as are breached passwords when a
+    # BreachFilter is given. Keeping only the valid passwords of uniform
+    # draws leaves every valid password equally likely.
+    def __init__(self, length=12, classes=None, block_size=1 << 20, breached=None):
+        classes = character_classes() if classes is None else classes
+        if length < len(classes):
+            raise ValueError(f"length must be at least {len(classes)} to use every "
+                             f"character type")
+        self.length = length
+        self.block_size = block_size
+        self.breached = breached
+        self.pool = ''.join(classes)
+        byte_table(self.pool)
+        
+        # Class bit of each character, and which masks have every bit
+        bits = bytearray(256)
+        for index, pool in enumerate(classes):
+            for char in pool.encode('ascii'):
+                bits[char] |= 1 << index
+        self.class_bits = bytes(bits)
+        full = (1 << len(classes)) - 1
+        self.complete = bytes(mask == full for mask in range(256))
+        self.acceptance = (covering_count(length, tuple(map(len, classes)))
+                           / len(self.pool) ** length)
+        self.filtered = len(classes) > 1
+
+    def layout(self, chars, count):
+        # count passwords of chars as bytes, one per line
+        length = self.length
+        out = bytearray(count * (length + 1))
+        out[length::length + 1] = b'\n' * count
+        for position in range(length):
+            out[position::length + 1] = chars[position::length]
+        return out
+
+    def block(self, count):
+        # count passwords that use every class as bytes, one per line
+        length = self.length
+        if not self.filtered and self.breached is None:
+            return self.layout(random_chars(self.pool, count * length), count)
+        kept = []
+        misses = 0
+        while len(kept) < count:
+            # Draw enough that one round usually covers the rejected ones
+            needed = count - len(kept)
+            drawn = int(needed / self.acceptance) + 16
+            chars = random_chars(self.pool, drawn * length)
+            passwords = self.layout(chars, drawn).split(b'\n')[:drawn]
+            if self.filtered:
+                masks = 0
+                for position in range(length):
+                    masks |= int.from_bytes(chars[position::length].translate(self.class_bits),
+                                            'big')
+                complete = masks.to_bytes(drawn, 'big').translate(self.complete)
+                passwords = compress(passwords, complete)
+            if self.breached is not None:
+                passwords = filterfalse(self.breached.__contains__, passwords)
+            before = len(kept)
+            kept += islice(passwords, needed)
+            # Give up the way the GUI does when the filter rejects everything
+            misses = misses + 1 if len(kept) == before else 0
+            if misses == MAX_REDRAWS:
+                raise ValueError("every candidate password is in the breached filter; "
+                                 "try a longer length")
+        kept.append(b'')
+        return b'\n'.join(kept)
+
+    def passwords(self, count):
+        return self.block(count).decode('ascii').split('\n')[:count]
+
+    def write(self, count, file):
+        # Streams count passwords to a binary file a block at a time
+        per_block = max(1, self.block_size // (self.length + 1))
+        while count > 0:
+            batch = min(count, per_block)
+            file.write(self.block(batch))
+            count -= batch
+
+@lru_cache(maxsize=8)
+def worker_generator(length, classes, breached_path=None):
+    # One BulkPasswordGenerator per worker process and set of options. Each
+    # process draws from os.urandom itself, so no generator state is shared
+    # or inherited across a fork.
+    breached = BreachFilter(breached_path) if breached_path else None
+    return BulkPasswordGenerator(length, classes, breached=breached)
+
+def generate_block(length, classes, count, breached_path=None):
+    return worker_generator(length, tuple(classes), breached_path).block(count)
+
+def write_shard(path, length, classes, count, breached_path=None):
+    # Fills one shard file with count passwords, one per line
+    with open(path, 'wb') as file:
+        worker_generator(length, tuple(classes), breached_path).write(count, file)
+    return count
+
+def shard_paths(output, workers):
+    # pw.txt -> pw.00.txt, pw.01.txt, ...
+    stem, extension = os.path.splitext(output)
+    digits = len(str(workers - 1))
+    return [f"{stem}.{index:0{digits}d}{extension}" for index in range(workers)]
+
+def write_shards(output, count, length, classes, workers, breached_path=None):
+    # Splits count passwords across workers, each streaming its share to its
+    # own shard file. Returns the shard paths.
+    paths = shard_paths(output, workers)
+    shares = [count // workers + (index < count % workers) for index in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(write_shard, paths, repeat(length), repeat(classes), shares,
+                      repeat(breached_path)))
+    return paths
+
+def stream_parallel(file, count, length, classes, workers, breached_path=None,
+                    block_size=1 << 20):
+    # Generates blocks of passwords in a process pool and writes them to one
+    # file from this process. Only a few blocks are in flight at a time, so
+    # memory stays bounded however many passwords are asked for.
+    per_block = max(1, block_size // (length + 1))
+    with ProcessPoolExecutor(workers) as pool:
+        in_flight = deque()
+        while count > 0:
+            batch = min(count, per_block)
+            in_flight.append(pool.submit(generate_block, length, classes, batch,
+                                         breached_path))
+            count -= batch
+            if len(in_flight) >= workers * 2:
+                file.write(in_flight.popleft().result())
+        while in_flight:
+            file.write(in_flight.popleft().result())
+
+# Class bit of every byte value, and how many characters each class adds to
+# the pool an attacker has to search. Spaces, control characters and the
+# bytes of non-ASCII characters share one class with a rough allowance.
+CLASS_SIZES = (26, 26, 10, len(string.punctuation), 64)
+CLASS_TABLE = bytes(1 if chr(byte) in string.ascii_uppercase else
+                    2 if chr(byte) in string.ascii_lowercase else
+                    4 if chr(byte) in string.digits else
+                    8 if chr(byte) in string.punctuation else 16
+                    for byte in range(256))
+
+# Bits of entropy per character for each combination of classes
+ENTROPY_PER_CHAR = tuple(math.log2(sum(size for i, size in enumerate(CLASS_SIZES)
+                                       if mask >> i & 1)) if mask else 0.0
+                         for mask in range(32))
+
+# Entropy in bits below which a password is weak, and below which moderate
+WEAK_BITS = 36
+MODERATE_BITS = 60
+
+def password_entropy(password):
+    # Length times log2 of the pool the used classes make up. The class bits
+    # are distinct powers of two, so the sum of the distinct bits is their OR.
+    mask = sum(set(password.encode('utf-8').translate(CLASS_TABLE)))
+    return len(password) * ENTROPY_PER_CHAR[mask]
+
+def strength_label(entropy):
+    if entropy < WEAK_BITS:
+        return "Weak"
+    if entropy < MODERATE_BITS:
+        return "Moderate"
+    return "Strong"
+
+# UTF-8 continuation bytes, left out when counting characters
+CONTINUATION_BYTES = bytes(range(0x80, 0xc0))
+
+def batch_entropy(passwords):
+    # Entropy of each of a list of UTF-8 encoded passwords. The per-password
+    # steps are chained map() calls over C functions, so no Python code runs
+    # per password.
+    masks = map(sum, map(set, map(bytes.translate, passwords, repeat(CLASS_TABLE))))
+    if all(map(bytes.isascii, passwords)):
+        lengths = map(len, passwords)
+    else:
+        lengths = map(len, map(bytes.translate, passwords, repeat(None),
+                               repeat(CONTINUATION_BYTES)))
+    return list(map(operator.mul, lengths, map(ENTROPY_PER_CHAR.__getitem__, masks)))
+
+def audit_passwords(file, chunk_size=1 << 24, breached=None):
+    # Streams a binary file of passwords, one per line, through
+    # batch_entropy. Returns the number of passwords, how many of them are
+    # weak and moderate, their total entropy, and how many are in the
+    # breached filter if one is given.
+    totals = [0, 0, 0, 0.0, 0]
+    
+    def tally(lines):
+        lines = list(filter(None, lines))
+        entropies = batch_entropy(lines)
+        totals[0] += len(entropies)
+        totals[1] += sum(map(float(WEAK_BITS).__gt__, entropies))
+        totals[2] += sum(map(float(MODERATE_BITS).__gt__, entropies))
+        totals[3] += sum(entropies)
+        if breached is not None:
+            totals[4] += sum(map(breached.__contains__, lines))
+    
+    rest = b''
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        lines = (rest + chunk).translate(None, b'\r').split(b'\n')
+        rest = lines.pop()
+        tally(lines)
+    tally([rest])
+    count, weak, below_strong, total, found = totals
+    return count, weak, below_strong - weak, total, found
+
+# Header of a breached-password filter file: magic, number of bits and
+# number of hash functions; the bit array follows
+BLOOM_MAGIC = b'PWBLOOM1'
+BLOOM_HEADER = struct.Struct('<8sQI')
+
+# A line of a SHA-1 dump: the hex hash, optionally followed by ":count"
+SHA1_LINE = re.compile(rb'[0-9A-Fa-f]{40}(:.*)?')
+
+def bloom_positions(digest, bits, hashes):
+    # Bit positions for a SHA-1 digest, by double hashing its first 16 bytes
+    first = int.from_bytes(digest[:8], 'little')
+    step = int.from_bytes(digest[8:16], 'little') | 1
+    return [(first + i * step) % bits for i in range(hashes)]
+
+class BreachFilter:
+    # Bloom filter over the SHA-1 of breached passwords, memory-mapped from
+    # the file build_breach_filter writes, so checking a password reads a
+    # few bytes of it and the corpus itself is never loaded. A hit means
+    # "probably breached", with the false positive rate it was built for.
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.hashes = BLOOM_HEADER.unpack_from(self.data)
+        if magic != BLOOM_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a breached-password filter")
+
+    def __contains__(self, password):
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        data = self.data
+        offset = BLOOM_HEADER.size
+        return all(data[offset + (position >> 3)] >> (position & 7) & 1
+                   for position in bloom_positions(hashlib.sha1(password).digest(),
+                                                   self.bits, self.hashes))
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+def build_breach_filter(source_path, target_path, false_positive_rate=0.001,
+                        sha1_dump=False):
+    # Compiles a dump of breached passwords, one per line, into a filter
+    # file, streaming it twice: once to count and once to set the bits. With
+    # sha1_dump, lines are hex SHA-1 hashes, optionally followed by
+    # ":count" as in the Pwned Passwords downloads; lines that aren't are
+    # reported with their line number and skipped. Returns the number of
+    # passwords, bits, hash functions and skipped lines.
+    def digests(report=False):
+        with open(source_path, 'rb') as source:
+            for number, line in enumerate(source, 1):
+                line = line.rstrip(b'\r\n')
+                if not line:
+                    continue
+                if not sha1_dump:
+                    yield hashlib.sha1(line).digest()
+                elif SHA1_LINE.fullmatch(line):
+                    yield bytes.fromhex(line[:40].decode('ascii'))
+                elif report:
+                    print(f"{source_path}:{number}: not a SHA-1 hash, skipped",
+                          file=sys.stderr)
+    
+    if sha1_dump:
+        count = sum(1 for digest in digests(report=True))
+        with open(source_path, 'rb') as source:
+            skipped = sum(1 for line in source if line.rstrip(b'\r\n')) - count
+    else:
+        with open(source_path, 'rb') as source:
+            count = sum(1 for line in source if line.rstrip(b'\r\n'))
+        skipped = 0
+    bits = max(64, math.ceil(-max(count, 1) * math.log(false_positive_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / max(count, 1) * math.log(2)))
+    
+    # Set the bits straight in a memory-mapped file, so the bit array
+    # doesn't have to fit in memory either
+    offset = BLOOM_HEADER.size
+    with open(target_path, 'w+b') as target:
+        target.truncate(offset + (bits + 7) // 8)
+        with mmap.mmap(target.fileno(), 0) as data:
+            BLOOM_HEADER.pack_into(data, 0, BLOOM_MAGIC, bits, hashes)
+            for digest in digests():
+                for position in bloom_positions(digest, bits, hashes):
+                    data[offset + (position >> 3)] |= 1 << (position & 7)
+            data.flush()
+    return count, bits, hashes, skipped
+
 class PasswordGenerator:
-    def __init__(self, root):
+    def __init__(self, root, breached=None):
         self.root = root
         self.root.title("Password Generator")
+        
+        # Filter of breached passwords to screen against, if one was built
+        self.breached = breached
         self.root.geometry("400x500")
         self.root.resizable(False, False)
         
@@ -75,33 +511,26 @@ class PasswordGenerator:
                 self.password_var.set("Invalid length")
                 return
             
-            # Create character pool based on selections
-            chars = ''
-            if self.uppercase_var.get():
-                chars += string.ascii_uppercase
-            if self.lowercase_var.get():
-                chars += string.ascii_lowercase
-            if self.numbers_var.get():
-                chars += string.digits
-            if self.symbols_var.get():
-                chars += string.punctuation
+            # Character classes based on selections
+            classes = character_classes(self.uppercase_var.get(), self.lowercase_var.get(),
+                                        self.numbers_var.get(), self.symbols_var.get())
                 
-            if not chars:
+            if not classes:
                 self.password_var.set("Please select at least one character type")
                 return
+            if length < len(classes):
+                self.password_var.set(f"Length must be at least {len(classes)}")
+                return
                 
-            # Generate password
-            password = ''.join(random.choice(chars) for _ in range(length))
-            
-            # Ensure at least one character from each selected type
-            if self.uppercase_var.get() and not any(c.isupper() for c in password):
-                password = self.replace_random_char(password, string.ascii_uppercase)
-            if self.lowercase_var.get() and not any(c.islower() for c in password):
-                password = self.replace_random_char(password, string.ascii_lowercase)
-            if self.numbers_var.get() and not any(c.isdigit() for c in password):
-                password = self.replace_random_char(password, string.digits)
-            if self.symbols_var.get() and not any(c in string.punctuation for c in password):
-                password = self.replace_random_char(password, string.punctuation)
+            # Generate a password with at least one character from each selected
+            # type, again if it turns up in the breached filter
+            for _ in range(100):
+                password = constrained_password(length, classes)
+                if self.breached is None or password not in self.breached:
+                    break
+            else:
+                self.password_var.set("Only breached passwords found; try a longer length")
+                return
                 
             self.password_var.set(password)
             self.evaluate_password_strength(password)
@@ -109,52 +538,260 @@ class PasswordGenerator:
         except ValueError:
             self.password_var.set("Please enter a valid number")
             
-    def replace_random_char(self, password, char_set):
-        if len(password) > 0:
-            replace_index = random.randint(0, len(password) - 1)
-            password_list = list(password)
-            password_list[replace_index] = random.choice(char_set)
-            return ''.join(password_list)
-        return password
-            
     def copy_to_clipboard(self):
         password = self.password_var.get()
-        if password and password not in ["Invalid length", "Please select at least one character type", "Please enter a valid number"]:
+        if password and password not in ["Invalid length", "Please select at least one character type", "Please enter a valid number"] and not password.startswith(("Length must be", "Only breached")):
             pyperclip.copy(password)
             
     def evaluate_password_strength(self, password):
-        score = 0
-        feedback = ""
-        
-        if len(password) >= 12:
-            score += 2
-        elif len(password) >= 8:
-            score += 1
-            
-        if any(c.isupper() for c in password):
-            score += 1
-        if any(c.islower() for c in password):
-            score += 1
-        if any(c.isdigit() for c in password):
-            score += 1
-        if any(c in string.punctuation for c in password):
-            score += 1
-            
-        if score >= 5:
-            feedback = "Strong"
-            self.strength_label.configure(foreground="green")
-        elif score >= 3:
-            feedback = "Moderate"
-            self.strength_label.configure(foreground="orange")
-        else:
-            feedback = "Weak"
+        if self.breached is not None and password in self.breached:
             self.strength_label.configure(foreground="red")
-            
-        self.strength_var.set(feedback)
+            self.strength_var.set("Breached (found in a known leak)")
+            return
+        entropy = password_entropy(password)
+        feedback = strength_label(entropy)
+        colors = {"Strong": "green", "Moderate": "orange", "Weak": "red"}
+        self.strength_label.configure(foreground=colors[feedback])
+        self.strength_var.set(f"{feedback} ({entropy:.0f} bits)")
+
+def patched_password(length, classes):
+    # The old approach, kept for comparison: draw from the whole pool with
+    # random.choice, then overwrite a random character for each missing class
+    password = ''.join(random.choice(''.join(classes)) for _ in range(length))
+    for pool in classes:
+        if not any(c in pool for c in password):
+            password_list = list(password)
+            password_list[random.randint(0, length - 1)] = random.choice(pool)
+            password = ''.join(password_list)
+    return password
+
+def chi_square_limit(df, z=3.09):
+    # Chi-square value exceeded with probability 0.001 (Wilson-Hilferty)
+    return df * (1 - 2 / (9 * df) + z * math.sqrt(2 / (9 * df))) ** 3
+
+def check_uniformity(samples_per_password=200):
+    # Every valid password of a tiny configuration (length 4 over "ab",
+    # "01" and "+") should come up equally often; a chi-square test over all
+    # of them, and over the position of each class, checks that
+    classes = ["ab", "01", "+"]
+    length = 4
+    valid = covering_count(length, tuple(map(len, classes)))
+    samples = valid * samples_per_password
+    bulk = BulkPasswordGenerator(length, classes)
+    for name, generate in (("patch", lambda: [patched_password(length, classes)
+                                              for _ in range(samples)]),
+                           ("construct", lambda: [constrained_password(length, classes)
+                                                  for _ in range(samples)]),
+                           ("bulk", lambda: bulk.passwords(samples))):
+        counts = {}
+        invalid = 0
+        for password in generate():
+            if all(any(c in pool for c in password) for pool in classes):
+                counts[password] = counts.get(password, 0) + 1
+            else:
+                invalid += 1
+        expected = samples / valid
+        statistic = sum((count - expected) ** 2 / expected for count in counts.values())
+        statistic += (valid - len(counts)) * expected
+        limit = chi_square_limit(valid - 1)
+        verdict = "uniform" if statistic < limit and not invalid else "NOT uniform"
+        print(f"  {name:9} chi-square {statistic:9.1f} (limit {limit:.1f} for "
+              f"{valid} passwords), {invalid} invalid: {verdict}")
+
+def scored_strength(password):
+    # The old 0-6 score, kept for comparison: a length check and four scans
+    score = 0
+    if len(password) >= 12:
+        score += 2
+    elif len(password) >= 8:
+        score += 1
+    if any(c.isupper() for c in password):
+        score += 1
+    if any(c.islower() for c in password):
+        score += 1
+    if any(c.isdigit() for c in password):
+        score += 1
+    if any(c in string.punctuation for c in password):
+        score += 1
+    return score
+
+def benchmark_strength(count=1000000):
+    # Passwords per second for the old score, the single-pass entropy and
+    # the batch path, on a mix of generated and weak passwords
+    generator = BulkPasswordGenerator(12)
+    passwords = generator.passwords(count // 2)
+    passwords += [password.lower()[:8] for password in passwords]
+    encoded = [password.encode('ascii') for password in passwords]
+    for name, score in (("score", lambda: list(map(scored_strength, passwords))),
+                        ("entropy", lambda: list(map(password_entropy, passwords))),
+                        ("batch", lambda: batch_entropy(encoded))):
+        start = time.perf_counter()
+        score()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:8} {len(passwords) / elapsed:12,.0f} passwords/sec")
+
+def benchmark_generation(count=200000, length=12):
+    # Passwords per second for the old patching approach, the constructive
+    # one the window uses, and the bulk generator
+    classes = character_classes()
+    bulk = BulkPasswordGenerator(length, classes)
+    for name, generate in (("patch", lambda: [patched_password(length, classes)
+                                              for _ in range(count)]),
+                           ("construct", lambda: [constrained_password(length, classes)
+                                                  for _ in range(count)]),
+                           ("bulk", lambda: bulk.passwords(count))):
+        start = time.perf_counter()
+        generate()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:9} {count / elapsed:12,.0f} passwords/sec")
+
+def benchmark_workers(count=4000000, length=12):
+    # Throughput of the process pool for 1, 2, 4, ... workers up to the
+    # number of cores, both writing shards and streaming to a single writer
+    classes = character_classes()
+    cores = os.cpu_count() or 1
+    counts = sorted({1 << power for power in range(cores.bit_length())} | {cores})
+    directory = tempfile.mkdtemp()
+    try:
+        output = os.path.join(directory, "passwords.txt")
+        sink = open(os.devnull, 'wb')
+        baseline = {}
+        for workers in counts:
+            for name, run in (("shards", lambda: write_shards(output, count, length,
+                                                              classes, workers)),
+                              ("stream", lambda: stream_parallel(sink, count, length,
+                                                                 classes, workers))):
+                start = time.perf_counter()
+                run()
+                rate = count / (time.perf_counter() - start)
+                baseline.setdefault(name, rate)
+                print(f"  {name} {workers:3} workers {rate:12,.0f} passwords/sec "
+                      f"({rate / baseline[name]:.1f}x)")
+        sink.close()
+    finally:
+        shutil.rmtree(directory)
 
 def main():
+    parser = argparse.ArgumentParser(description="Password Generator")
+    parser.add_argument('--count', type=int,
+                        help="write this many passwords, one per line, without "
+                             "opening the window")
+    parser.add_argument('--length', type=int, default=12,
+                        help="password length for --count")
+    parser.add_argument('--output', metavar='FILE',
+                        help="where to write the passwords (default: standard output)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="generate --count in this many processes; with "
+                             "--output each writes its own shard, e.g. "
+                             "pw.00.txt, pw.01.txt")
+    parser.add_argument('--no-uppercase', action='store_true',
+                        help="leave out uppercase letters")
+    parser.add_argument('--no-lowercase', action='store_true',
+                        help="leave out lowercase letters")
+    parser.add_argument('--no-numbers', action='store_true',
+                        help="leave out digits")
+    parser.add_argument('--no-symbols', action='store_true',
+                        help="leave out special characters")
+    parser.add_argument('--check', action='store_true',
+                        help="run chi-square tests that every valid password is "
+                             "equally likely")
+    parser.add_argument('--audit', metavar='FILE',
+                        help="summarize the strength of a file of passwords, "
+                             "one per line")
+    parser.add_argument('--breached', metavar='FILE', default='breached.bloom',
+                        help="breached-password filter to screen against, if it "
+                             "exists (default: breached.bloom)")
+    parser.add_argument('--build-breached', metavar='DUMP',
+                        help="compile a dump of breached passwords, one per line, "
+                             "into the --breached filter")
+    parser.add_argument('--sha1-dump', action='store_true',
+                        help="the dump has hex SHA-1 hashes (optionally with "
+                             ":count) instead of passwords")
+    parser.add_argument('--false-positive-rate', type=float, default=0.001,
+                        help="share of unbreached passwords the filter may flag")
+    parser.add_argument('--benchmark', choices=['generate', 'strength', 'workers'],
+                        help="time password generation or strength evaluation "
+                             "approaches")
+    args = parser.parse_args()
+    
+    if args.build_breached:
+        start = time.perf_counter()
+        count, bits, hashes, skipped = build_breach_filter(args.build_breached,
+                                                           args.breached,
+                                                           args.false_positive_rate,
+                                                           args.sha1_dump)
+        print(f"Indexed {count} breached passwords into {args.breached} "
+              f"({bits // 8:,} bytes, {hashes} hashes) in "
+              f"{time.perf_counter() - start:.1f}s")
+        if skipped:
+            print(f"Skipped {skipped} malformed lines", file=sys.stderr)
+        return
+    
+    breached = BreachFilter(args.breached) if os.path.exists(args.breached) else None
+    
+    if args.audit:
+        start = time.perf_counter()
+        with open(args.audit, 'rb') as file:
+            count, weak, moderate, total, found = audit_passwords(file, breached=breached)
+        elapsed = time.perf_counter() - start
+        print(f"{count} passwords: {weak} weak, {moderate} moderate, "
+              f"{count - weak - moderate} strong, "
+              f"{total / max(count, 1):.1f} bits on average ({elapsed:.1f}s)")
+        if breached is not None:
+            print(f"{found} found in {args.breached}")
+        return
+    
+    if args.check:
+        check_uniformity()
+        return
+    if args.benchmark == 'generate':
+        benchmark_generation()
+        return
+    if args.benchmark == 'strength':
+        benchmark_strength()
+        return
+    if args.benchmark == 'workers':
+        benchmark_workers()
+        return
+    
+    if args.count is not None:
+        classes = character_classes(not args.no_uppercase, not args.no_lowercase,
+                                    not args.no_numbers, not args.no_symbols)
+        if not classes:
+            parser.error("at least one character type is needed")
+        try:
+            generator = BulkPasswordGenerator(args.length, classes, breached=breached)
+        except ValueError as error:
+            parser.error(str(error))
+        if args.workers < 1:
+            parser.error("--workers must be at least 1")
+        breached_path = args.breached if breached is not None else None
+        start = time.perf_counter()
+        try:
+            if args.workers > 1 and args.output:
+                paths = write_shards(args.output, args.count, args.length, classes,
+                                     args.workers, breached_path)
+                print(f"Wrote {len(paths)} shards: {paths[0]} to {paths[-1]}",
+                      file=sys.stderr)
+            elif args.workers > 1:
+                stream_parallel(sys.stdout.buffer, args.count, args.length, classes,
+                                args.workers, breached_path)
+                sys.stdout.flush()
+            elif args.output:
+                with open(args.output, 'wb') as file:
+                    generator.write(args.count, file)
+            else:
+                generator.write(args.count, sys.stdout.buffer)
+                sys.stdout.flush()
+        except ValueError as error:
+            parser.error(str(error))
+        elapsed = time.perf_counter() - start
+        print(f"Generated {args.count} passwords in {elapsed:.2f}s "
+              f"({args.count / elapsed:,.0f}/s)", file=sys.stderr)
+        return
+    
     root = tk.Tk()
-    app = PasswordGenerator(root)
+    app = PasswordGenerator(root, breached)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,13 +1,311 @@
+import argparse
+import csv
 import random
+import sys
 import time
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Choices and outcomes are small ints, so a round is one table lookup
+ROCK, PAPER, SCISSORS = range(3)
+CHOICES = ('rock', 'paper', 'scissors')
+TIE, WIN, LOSE = range(3)
+RESULTS = ('tie', 'win', 'lose')
+
+# OUTCOMES[player * 3 + computer] is the player's result. Each choice beats
+# the one before it, so this is (player - computer) % 3. The table is padded
+# to 256 entries so it can also be used with bytes.translate.
+OUTCOMES = bytes((player - computer) % 3 for player in range(3)
+                 for computer in range(3)) + bytes(247)
+
+# A random byte as a choice; 255 is dropped so all three are equally likely
+CHOICE_TABLE = bytes(byte % 3 for byte in range(256))
+REJECTED_BYTES = bytes([255])
+
+def resolve(player, computer):
+    return OUTCOMES[player * 3 + computer]
+
+def resolve_batch(players, computers):
+    # Outcomes of many rounds as bytes, from bytes of player and computer
+    # choices. player * 3 + computer is worked out for every round in one
+    # big-int multiply and add, since no byte can carry into the next.
+    pairs = int.from_bytes(players, 'big') * 3 + int.from_bytes(computers, 'big')
+    return pairs.to_bytes(len(players), 'big').translate(OUTCOMES)
+
+def random_choices(count, rng=None):
+    # count uniformly random choices as bytes, from rng (a random.Random)
+    # for a reproducible run, or from os.urandom
+    draw = os.urandom if rng is None else rng.randbytes
+    parts = []
+    needed = count
+    while needed > 0:
+        part = draw(needed + needed // 128 + 16).translate(CHOICE_TABLE, REJECTED_BYTES)
+        parts.append(part)
+        needed -= len(part)
+    return b''.join(parts)[:count]
+
+def tally(outcomes):
+    # (wins, losses, ties) in bytes of outcomes
+    return outcomes.count(WIN), outcomes.count(LOSE), outcomes.count(TIE)
+
+def simulate(rounds, seed=None, block_size=1 << 20):
+    # Plays a random player against a random computer a block of rounds at
+    # a time. Returns (wins, losses, ties) for the player.
+    rng = None if seed is None else random.Random(seed)
+    wins = losses = ties = 0
+    while rounds > 0:
+        size = min(rounds, block_size)
+        outcomes = resolve_batch(random_choices(size, rng), random_choices(size, rng))
+        block_wins, block_losses, block_ties = tally(outcomes)
+        wins += block_wins
+        losses += block_losses
+        ties += block_ties
+        rounds -= size
+    return wins, losses, ties
+
+# The choice that beats each choice
+BEATS = (PAPER, SCISSORS, ROCK)
+
+def best_reply(counts, offset, rng):
+    # The choice that beats the most counted of counts[offset:offset + 3],
+    # or a random one while nothing has been counted
+    rock, paper, scissors = counts[offset:offset + 3]
+    if rock == paper == scissors:
+        return rng.randrange(3)
+    if rock >= paper and rock >= scissors:
+        return PAPER
+    return SCISSORS if paper >= scissors else ROCK
+
+# Counts are halved once one reaches this, so old habits fade and the
+# counts stay small
+COUNT_LIMIT = 64
+
+# Computer strategies. choose() picks the computer's next move and
+# update(player, computer) records a finished round; both take constant
+# time and memory.
+class RandomStrategy:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose(self):
+        return self.rng.randrange(3)
+
+    def update(self, player, computer):
+        pass
+
+class FrequencyStrategy:
+    # Beats the player's most frequent choice
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.counts = [0, 0, 0]
+
+    def choose(self):
+        return best_reply(self.counts, 0, self.rng)
+
+    def update(self, player, computer):
+        counts = self.counts
+        counts[player] += 1
+        if counts[player] >= COUNT_LIMIT:
+            counts[:] = [count >> 1 for count in counts]
+
+class MarkovStrategy:
+    # Beats the player's most frequent choice after their last order
+    # choices. The counts are one flat table with a row of three for each
+    # of the 3 ** order histories, and the history is kept as a base-3
+    # number rather than a list.
+    def __init__(self, seed=None, order=1):
+        self.rng = random.Random(seed)
+        self.states = 3 ** order
+        self.counts = [0] * (self.states * 3)
+        self.state = 0
+
+    def choose(self):
+        return best_reply(self.counts, self.state * 3, self.rng)
+
+    def update(self, player, computer):
+        counts = self.counts
+        row = self.state * 3
+        counts[row + player] += 1
+        if counts[row + player] >= COUNT_LIMIT:
+            counts[row:row + 3] = [count >> 1 for count in counts[row:row + 3]]
+        self.state = (self.state * 3 + player) % self.states
+
+class EnsembleStrategy:
+    # Plays the move of whichever strategy has been winning lately. Every
+    # strategy sees every round, and scores +1 when its own move would have
+    # won and -1 when it would have lost, with older rounds fading out.
+    def __init__(self, seed=None, strategies=None, decay=0.9):
+        rng = random.Random(seed)
+        if strategies is None:
+            strategies = [RandomStrategy(rng.random()), FrequencyStrategy(rng.random()),
+                          MarkovStrategy(rng.random(), 1), MarkovStrategy(rng.random(), 2)]
+        self.strategies = strategies
+        self.scores = [0.0] * len(strategies)
+        self.moves = [0] * len(strategies)
+        self.decay = decay
+
+        # Score change for each outcome code, as the strategy's move
+        self.points = {TIE: 0, WIN: 1, LOSE: -1}
+
+    def choose(self):
+        self.moves = [strategy.choose() for strategy in self.strategies]
+        scores = self.scores
+        return self.moves[scores.index(max(scores))]
+
+    def update(self, player, computer):
+        decay = self.decay
+        points = self.points
+        self.scores = [score * decay + points[OUTCOMES[move * 3 + player]]
+                       for score, move in zip(self.scores, self.moves)]
+        for strategy in self.strategies:
+            strategy.update(player, computer)
+
+STRATEGIES = {
+    'random': RandomStrategy,
+    'frequency': FrequencyStrategy,
+    'markov': MarkovStrategy,
+    'markov2': lambda seed=None: MarkovStrategy(seed, order=2),
+    'ensemble': EnsembleStrategy,
+}
+
+# Scripted players for testing strategies. Each makes a function that takes
+# the computer's last move (None before the first round) and returns the
+# player's next one.
+def constant_player(seed=None):
+    return lambda last: ROCK
+
+def cycle_player(seed=None):
+    moves = [SCISSORS]
+    def play(last):
+        moves[0] = (moves[0] + 1) % 3
+        return moves[0]
+    return play
+
+def beat_last_player(seed=None):
+    # Plays what would have beaten the computer's last move
+    rng = random.Random(seed)
+    return lambda last: rng.randrange(3) if last is None else BEATS[last]
+
+def biased_player(seed=None):
+    # Rock half of the time, otherwise random
+    rng = random.Random(seed)
+    return lambda last: ROCK if rng.random() < 0.5 else rng.randrange(3)
+
+def random_player(seed=None):
+    rng = random.Random(seed)
+    return lambda last: rng.randrange(3)
+
+PLAYERS = {
+    'constant': constant_player,
+    'cycle': cycle_player,
+    'beat-last': beat_last_player,
+    'biased': biased_player,
+    'random': random_player,
+}
+
+def play_match(strategy, player, rounds):
+    # Plays a strategy against a scripted player. Returns (wins, losses,
+    # ties) for the strategy.
+    counts = [0, 0, 0]
+    computer = None
+    choose = strategy.choose
+    update = strategy.update
+    for _ in range(rounds):
+        move = player(computer)
+        computer = choose()
+        counts[OUTCOMES[computer * 3 + move]] += 1
+        update(move, computer)
+    return counts[WIN], counts[LOSE], counts[TIE]
+
+def play_strategies(first, second, rounds):
+    # Plays two strategies against each other. Returns (wins, losses, ties)
+    # for the first.
+    counts = [0, 0, 0]
+    first_choose, first_update = first.choose, first.update
+    second_choose, second_update = second.choose, second.update
+    for _ in range(rounds):
+        first_move = first_choose()
+        second_move = second_choose()
+        counts[OUTCOMES[first_move * 3 + second_move]] += 1
+        first_update(second_move, first_move)
+        second_update(first_move, second_move)
+    return counts[WIN], counts[LOSE], counts[TIE]
+
+def match_seed(seed, first, second):
+    # A match's seed depends only on the tournament seed and the two
+    # strategy names, so results don't depend on which worker plays it or
+    # when. Seeding random.Random with a str is stable across runs.
+    return random.Random(f"{seed}:{first}:{second}").getrandbits(64)
+
+def run_match(first, second, rounds, seed):
+    seed = match_seed(seed, first, second)
+    return play_strategies(STRATEGIES[first](2 * seed), STRATEGIES[second](2 * seed + 1),
+                           rounds)
+
+def run_tournament(rounds, seed=0, workers=1, names=None):
+    # Round-robin of every pair of strategies, one match of rounds per pair,
+    # spread over a process pool. Returns the names and the win, loss and
+    # tie matrices, where wins[i][j] is how often names[i] beat names[j].
+    names = list(STRATEGIES) if names is None else list(names)
+    pairs = [(i, j) for i in range(len(names)) for j in range(i + 1, len(names))]
+    firsts = [names[i] for i, j in pairs]
+    seconds = [names[j] for i, j in pairs]
+    if workers <= 1:
+        results = list(map(run_match, firsts, seconds, repeat(rounds), repeat(seed)))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(run_match, firsts, seconds, repeat(rounds),
+                                    repeat(seed)))
+    size = len(names)
+    wins = [[0] * size for _ in range(size)]
+    losses = [[0] * size for _ in range(size)]
+    ties = [[0] * size for _ in range(size)]
+    for (i, j), (won, lost, tied) in zip(pairs, results):
+        wins[i][j] = losses[j][i] = won
+        losses[i][j] = wins[j][i] = lost
+        ties[i][j] = ties[j][i] = tied
+    return names, wins, losses, ties
+
+def tournament_table(names, wins, losses, ties):
+    # One row per strategy, best first by wins minus losses: the strategy,
+    # its totals and win rate, then its wins against each opponent
+    rows = []
+    for i, name in enumerate(names):
+        won, lost, tied = sum(wins[i]), sum(losses[i]), sum(ties[i])
+        played = won + lost + tied
+        rows.append([name, won, lost, tied, f"{won / played:.4f}" if played else "0"]
+                    + wins[i])
+    rows.sort(key=lambda row: row[2] - row[1])
+    header = ["strategy", "wins", "losses", "ties", "win rate"] + [f"vs {name}" for name in names]
+    return header, rows
+
+def write_tournament(file, names, wins, losses, ties):
+    header, rows = tournament_table(names, wins, losses, ties)
+    writer = csv.writer(file)
+    writer.writerow(header)
+    writer.writerows(rows)
+
+def compared_winner(player_choice, computer_choice):
+    # The original string comparisons, kept for the benchmark
+    if player_choice == computer_choice:
+        return 'tie'
+    elif ((player_choice == 'rock' and computer_choice == 'scissors') or
+          (player_choice == 'paper' and computer_choice == 'rock') or
+          (player_choice == 'scissors' and computer_choice == 'paper')):
+        return 'win'
+    else:
+        return 'lose'
 
 class RockPaperScissors:
-    def __init__(self):
-        self.choices = ['rock', 'paper', 'scissors']
+    def __init__(self, fast=False, strategy='random'):
+        self.choices = list(CHOICES)
+        self.strategy = STRATEGIES[strategy]()
         self.symbols = {'rock': '🪨', 'paper': '📄', 'scissors': '✂️'}
         self.player_score = 0
         self.computer_score = 0
+        # Skip the "Rock... Paper... Scissors..." pauses
+        self.fast = fast
         self.winning_messages = [
             "🌟 AMAZING! You're a superstar! 🌟",
             "🎉 WONDERFUL! Keep shining! 🎉",
@@ -30,6 +328,10 @@ class RockPaperScissors:
     def clear_screen(self):
         os.system('cls' if os.name == 'nt' else 'clear')
 
+    def pause(self, seconds):
+        if not self.fast:
+            time.sleep(seconds)
+
     def print_title(self):
         title = """
         🎮 ROCK PAPER SCISSORS 🎮
@@ -53,26 +355,21 @@ class RockPaperScissors:
             try:
                 choice = input("\nEnter your choice (1-3): ")
                 if choice.isdigit() and 1 <= int(choice) <= 3:
-                    return self.choices[int(choice) - 1]
+                    return int(choice) - 1
                 else:
                     print("Oops! Please enter a number between 1 and 3!")
             except ValueError:
                 print("Oops! Please enter a valid number!")
 
     def get_computer_choice(self):
-        return random.choice(self.choices)
+        return self.strategy.choose()
 
     def determine_winner(self, player_choice, computer_choice):
-        if player_choice == computer_choice:
-            return 'tie'
-        elif ((player_choice == 'rock' and computer_choice == 'scissors') or
-              (player_choice == 'paper' and computer_choice == 'rock') or
-              (player_choice == 'scissors' and computer_choice == 'paper')):
-            return 'win'
-        else:
-            return 'lose'
+        return RESULTS[resolve(player_choice, computer_choice)]
 
     def display_choices(self, player_choice, computer_choice):
+        player_choice = self.choices[player_choice]
+        computer_choice = self.choices[computer_choice]
         print(f"\nYour choice: {self.symbols[player_choice]} {player_choice.title()}")
         print(f"Computer's choice: {self.symbols[computer_choice]} {computer_choice.title()}")
 
@@ -105,13 +402,13 @@ class RockPaperScissors:
             # Get choices
             player_choice = self.get_player_choice()
             print("\n🎮 Rock...")
-            time.sleep(0.5)
+            self.pause(0.5)
             print("📄 Paper...")
-            time.sleep(0.5)
+            self.pause(0.5)
             print("✂️ Scissors...")
-            time.sleep(0.5)
+            self.pause(0.5)
             print("👾 Shoot!\n")
-            time.sleep(0.5)
+            self.pause(0.5)
             
             computer_choice = self.get_computer_choice()
             
@@ -119,6 +416,7 @@ class RockPaperScissors:
             self.display_choices(player_choice, computer_choice)
             result = self.determine_winner(player_choice, computer_choice)
             self.display_result(result)
+            self.strategy.update(player_choice, computer_choice)
             
             # Ask to play again
             if not self.play_again():
@@ -128,6 +426,115 @@ class RockPaperScissors:
                 print("\nThanks for playing! Come back soon! 👋")
                 break
 
-if __name__ == "__main__":
-    game = RockPaperScissors()
+def benchmark_rounds(rounds=3000000):
+    # Rounds per second for the string comparisons, one table lookup per
+    # round, and the batch path
+    rng = random.Random(1)
+    players = random_choices(rounds, rng)
+    computers = random_choices(rounds, rng)
+    named = [(CHOICES[player], CHOICES[computer])
+             for player, computer in zip(players, computers)]
+    for name, run in (("strings", lambda: [compared_winner(player, computer)
+                                           for player, computer in named]),
+                      ("table", lambda: [OUTCOMES[player * 3 + computer]
+                                         for player, computer in zip(players, computers)]),
+                      ("batch", lambda: tally(resolve_batch(players, computers))),
+                      ("simulate", lambda: simulate(rounds, seed=1))):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:8} {rounds / elapsed:14,.0f} rounds/sec")
+
+def benchmark_strategies(rounds=200000):
+    # Decisions per second and win rate of every strategy against every
+    # scripted player
+    print(f"  {'':10}" + "".join(f"{name:>11}" for name in PLAYERS) + "  decisions/sec")
+    for name, make_strategy in STRATEGIES.items():
+        rates = []
+        elapsed = 0.0
+        for seed, make_player in enumerate(PLAYERS.values()):
+            strategy = make_strategy(2 * seed)
+            player = make_player(2 * seed + 1)
+            start = time.perf_counter()
+            wins, losses, ties = play_match(strategy, player, rounds)
+            elapsed += time.perf_counter() - start
+            rates.append(wins / rounds)
+        print(f"  {name:10}" + "".join(f"{rate:11.1%}" for rate in rates)
+              + f"  {rounds * len(PLAYERS) / elapsed:13,.0f}")
+
+def benchmark_tournament(rounds=100000, seed=0):
+    # Wall time of the tournament for 1, 2, 4, ... workers up to the number
+    # of cores, checking every run gives the same results
+    cores = os.cpu_count() or 1
+    counts = sorted({1 << power for power in range(cores.bit_length())} | {cores})
+    baseline = expected = None
+    for workers in counts:
+        start = time.perf_counter()
+        results = run_tournament(rounds, seed, workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        expected = expected or results
+        print(f"  {workers:3} workers {elapsed:8.2f}s ({baseline / elapsed:.1f}x)"
+              f"{'' if results == expected else '  results differ!'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Rock Paper Scissors")
+    parser.add_argument('--fast', action='store_true',
+                        help="skip the pauses between Rock, Paper and Scissors")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='random',
+                        help="how the computer picks its moves")
+    parser.add_argument('--simulate', type=int, metavar='ROUNDS',
+                        help="play this many random rounds without the game and "
+                             "print the results")
+    parser.add_argument('--tournament', type=int, metavar='ROUNDS',
+                        help="play every pair of strategies against each other "
+                             "for this many rounds and print a ranking")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="processes for --tournament (default: all cores)")
+    parser.add_argument('--output', metavar='FILE',
+                        help="also write the --tournament table to this CSV file")
+    parser.add_argument('--seed', type=int,
+                        help="seed for --simulate or --tournament, for a "
+                             "reproducible run")
+    parser.add_argument('--benchmark', choices=['rounds', 'strategies', 'tournament'],
+                        help="time the ways of deciding rounds, the computer "
+                             "strategies against scripted players, or the "
+                             "tournament with more and more workers")
+    args = parser.parse_args()
+    
+    if args.benchmark == 'rounds':
+        benchmark_rounds()
+        return
+    if args.benchmark == 'strategies':
+        benchmark_strategies()
+        return
+    if args.benchmark == 'tournament':
+        benchmark_tournament()
+        return
+    if args.tournament is not None:
+        start = time.perf_counter()
+        results = run_tournament(args.tournament, args.seed or 0, args.workers)
+        elapsed = time.perf_counter() - start
+        header, rows = tournament_table(*results)
+        print(f"{'strategy':10} {'wins':>12} {'losses':>12} {'ties':>12} {'win rate':>9}")
+        for name, won, lost, tied, rate, *_ in rows:
+            print(f"{name:10} {won:12} {lost:12} {tied:12} {float(rate):9.2%}")
+        if args.output:
+            with open(args.output, 'w', newline='') as file:
+                write_tournament(file, *results)
+        print(f"{len(rows) * (len(rows) - 1) // 2} matches of {args.tournament} rounds "
+              f"in {elapsed:.1f}s", file=sys.stderr)
+        return
+    if args.simulate is not None:
+        start = time.perf_counter()
+        wins, losses, ties = simulate(args.simulate, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"{args.simulate} rounds: {wins} wins, {losses} losses, {ties} ties "
+              f"({elapsed:.2f}s, {args.simulate / max(elapsed, 1e-9):,.0f} rounds/sec)")
+        return
+    
+    game = RockPaperScissors(fast=args.fast, strategy=args.strategy)
     game.play_game()
+
+if __name__ == "__main__":
+    main()